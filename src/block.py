@@ -2,6 +2,21 @@ import hashlib
 import time
 import json
 
+HEADER_FIELDS = ("index", "timestamp", "previous_hash", "nonce", "tx_root")
+HASH_VERSION = 2  # Version 1 hashed whole blocks; bump whenever the hash rule changes
+
+def transactions_root(transactions):
+    """SHA-256 of the canonical serialized transaction list"""
+    return hashlib.sha256(json.dumps(transactions, sort_keys=True).encode()).hexdigest()
+
+def header_hash(header):
+    """
+    SHA-256 of a block header. Transactions enter only through tx_root,
+    so a header alone is enough to verify a block hash.
+    """
+    header_string = json.dumps({field: header[field] for field in HEADER_FIELDS}, sort_keys=True).encode()
+    return hashlib.sha256(header_string).hexdigest()
+
 class Block:
     def __init__(self, index, transactions, timestamp, previous_hash):
         """
@@ -18,31 +33,52 @@ class Block:
         self.previous_hash = previous_hash
         self.nonce = 0  # Mining counter
         self.hash = None  # Will be set during mining
+        # Commits the header to the body; kept when the body is pruned
+        self.tx_root = None if transactions is None else transactions_root(transactions)
     
-    def calculate_hash(self):
-        """
-        Calculate SHA-256 hash of the block's contents
-        """
-        block_string = json.dumps({
+    def header(self):
+        """Header fields the block hash is computed over"""
+        return {
             "index": self.index,
-            "transactions": self.transactions,
             "timestamp": self.timestamp,
             "previous_hash": self.previous_hash,
-            "nonce": self.nonce
-        }, sort_keys=True).encode()
-        
-        return hashlib.sha256(block_string).hexdigest()
+            "nonce": self.nonce,
+            "tx_root": self.tx_root
+        }
+    
+    def calculate_hash(self):
+        """
+        Calculate SHA-256 hash of the block header. When the block has its
+        transactions the root is recomputed from them, so edited
+        transactions change the hash.
+        """
+        header = self.header()
+        if self.transactions is not None:
+            header["tx_root"] = transactions_root(self.transactions)
+        return header_hash(header)
     
-    def mine_block(self, difficulty):
+    def mine_block(self, difficulty, cancel_event=None):
         """
         Perform proof-of-work mining
+        
+        :param difficulty: Number of leading zeros required
+        :param cancel_event: Optional threading.Event; when set, mining stops
+                             and None is returned (e.g. the chain tip moved)
         """
         print(f"⛏️  Mining block {self.index} with difficulty {difficulty}...")
         prefix = "0" * difficulty
         start_time = time.time()
+        # Only the nonce changes between attempts; the root is hashed once
+        self.tx_root = transactions_root(self.transactions)
+        header = self.header()
         
         while True:
-            self.hash = self.calculate_hash()
+            if cancel_event is not None and cancel_event.is_set():
+                self.hash = None
+                print(f"🛑 Mining of block {self.index} aborted after {self.nonce} attempts")
+                return None
+            header["nonce"] = self.nonce
+            self.hash = header_hash(header)
             if self.hash.startswith(prefix):
                 break
             self.nonce += 1
@@ -52,13 +88,42 @@ class Block:
         print(f"🔢 Nonce: {self.nonce} | ⏱️  Time: {mining_time:.2f}s")
         return self
     
+    def has_valid_proof(self, difficulty):
+        """
+        Stateless check: stored hash matches the contents and meets difficulty
+        """
+        return (
+            self.hash is not None
+            and self.hash == self.calculate_hash()
+            and self.hash.startswith("0" * difficulty)
+        )
+    
+    @classmethod
+    def from_dict(cls, block_data):
+        """
+        Rebuild a block from its serialized dictionary. The stored root is
+        only used for pruned blocks; otherwise it is derived from the body.
+        """
+        block = cls(
+            index=block_data['index'],
+            transactions=block_data['transactions'],
+            timestamp=block_data['timestamp'],
+            previous_hash=block_data['previous_hash']
+        )
+        block.nonce = block_data['nonce']
+        block.hash = block_data['hash']
+        if block.transactions is None:
+            block.tx_root = block_data.get('tx_root')
+        return block
+    
     def __repr__(self):
         """User-friendly block representation"""
         short_hash = self.hash[:8] + "..." if self.hash else "None"
         return (
             f"Block(index={self.index}, hash={short_hash}, "
             f"prev_hash={self.previous_hash[:8]}..., "
-            f"transactions={len(self.transactions)}, nonce={self.nonce})"
+            f"transactions={len(self.transactions) if self.transactions is not None else 'pruned'}, "
+            f"nonce={self.nonce})"
         )
 
 # Test execution when run directly
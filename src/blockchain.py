@@ -1,16 +1,55 @@
-from block import Block
+from block import Block, HASH_VERSION
+from rwlock import ReadWriteLock
+from state import AccountState
+from storage import SegmentStore, SEGMENT_SIZE, segment_directory
+from chain_io import write_chain_file, iter_chain_file
+from transaction import Transaction, COINBASE, transaction_id
+from collections import Counter, deque
+import threading
 import time
 import json
+import os
+
+MINING_REWARD = 50  # Coins minted to the miner of each block
+CHECKPOINT_INTERVAL = 100  # Blocks between account-state checkpoints
+CONFIRMED_WINDOW = 1000  # Recent blocks whose transfer txids are indexed against re-admission
+
+def checkpoint_filename(filename):
+    """Account-state checkpoint file stored next to a chain file"""
+    base, _ = os.path.splitext(filename)
+    return base + ".state.json"
 
 class Blockchain:
-    def __init__(self, difficulty=2):
+    def __init__(self, difficulty=2, prune_depth=None, archive=True, compression='lzma'):
         """
         Initialize a new blockchain with genesis block
         :param difficulty: Number of leading zeros required for mining
+        :param prune_depth: Keep transaction bodies only for this many recent
+                            blocks (None keeps everything)
+        :param archive: Move pruned bodies to compressed segments instead of
+                        discarding them
+        :param compression: Segment compression, 'lzma' or 'zlib'
         """
         self.difficulty = difficulty
         self.chain = [self.create_genesis_block()]
         self.pending_transactions = []  # Temporary storage before mining
+        self._lock = ReadWriteLock()  # Many readers, single writer
+        self._tip_listeners = []  # Called with the new block on every append
+        self._pending_since = None  # Arrival time of the oldest pending transaction
+        self._save_lock = threading.Lock()  # Serializes writers of the chain file
+        self.state = AccountState()  # Balances indexed incrementally per block
+        self._pending_spend = {}  # sender -> amount committed by pending transactions
+        self._pending_nonces = {}  # sender -> next nonce after pending transactions
+        self._checkpoint_height = -1
+        self.state.apply_block(self.chain[0])
+        self.prune_depth = prune_depth
+        self.archive = archive
+        self.compression = compression
+        self.pruned_height = -1  # Highest block whose body left memory
+        self.segments = None  # SegmentStore next to the chain file
+        self._confirmed = Counter()  # txid -> copies in the last CONFIRMED_WINDOW blocks
+        self._confirmed_blocks = deque()  # txid lists of those blocks, oldest first
+        self._index_confirmed()
         
     def create_genesis_block(self):
         """
@@ -29,99 +68,554 @@ class Blockchain:
     def add_transaction(self, transaction):
         """
         Add a new transaction to be included in next block
+        :param transaction: Transaction, its dict form, or a free-form string
+        Returns the index of the next block, or None if rejected.
         """
-        self.pending_transactions.append(transaction)
-        return self.last_block.index + 1  # Next block index
+        if isinstance(transaction, Transaction):
+            transaction = transaction.to_dict()
+        with self._lock.write():
+            tx = Transaction.from_dict(transaction)
+            if tx is not None and self._confirmed[tx.txid]:
+                # Usually gossip that arrived after the block carrying it
+                print("ℹ️  Ignored transaction that is already in a recent block")
+                return None
+            if tx is not None and not self._admit_to_pool(tx):
+                return None
+            if not self.pending_transactions:
+                self._pending_since = time.time()
+            self.pending_transactions.append(transaction)
+            return self.chain[-1].index + 1  # Next block index
     
-    def mine_pending_transactions(self):
+    def _admit_to_pool(self, tx):
         """
-        Create a new block with pending transactions and mine it
+        O(1) mempool check against the account state plus what pending
+        transactions already commit. Caller must hold the write lock.
         """
-        if not self.pending_transactions:
-            print("⚠️  No transactions to mine!")
-            return None
-            
-        new_block = Block(
-            index=len(self.chain),
-            transactions=self.pending_transactions,
+        if not tx.is_well_formed() or tx.is_coinbase:
+            print(f"❌ Rejected malformed transaction {tx}")
+            return False
+        expected_nonce = self._pending_nonces.get(tx.sender, self.state.next_nonce(tx.sender))
+        if tx.nonce != expected_nonce:
+            print(f"❌ Rejected {tx}: expected nonce {expected_nonce}")
+            return False
+        spendable = self.state.balance(tx.sender) - self._pending_spend.get(tx.sender, 0)
+        if spendable < tx.amount:
+            print(f"❌ Rejected {tx}: insufficient balance ({spendable} available)")
+            return False
+        self._pending_spend[tx.sender] = self._pending_spend.get(tx.sender, 0) + tx.amount
+        self._pending_nonces[tx.sender] = tx.nonce + 1
+        return True
+    
+    def _revalidate_pending(self):
+        """
+        Rebuild the mempool index after the state moved, dropping transactions
+        a new block made invalid. Caller must hold the write lock.
+        """
+        self._pending_spend = {}
+        self._pending_nonces = {}
+        remaining = []
+        for data in self.pending_transactions:
+            if self._confirmed[transaction_id(data)]:
+                continue
+            tx = Transaction.from_dict(data)
+            if tx is None or self._admit_to_pool(tx):
+                remaining.append(data)
+        self.pending_transactions = remaining
+        if not remaining:
+            self._pending_since = None
+    
+    def next_nonce(self, account):
+        """Nonce the next transaction from account must use"""
+        with self._lock.read():
+            return self._pending_nonces.get(account, self.state.next_nonce(account))
+    
+    def get_balance(self, account):
+        """Confirmed balance of an account, read from the state index"""
+        with self._lock.read():
+            return self.state.balance(account)
+    
+    def get_history(self, account, limit=None):
+        """
+        Confirmed transfers touching an account, newest last
+        Each entry is [height, txid, sender, recipient, amount].
+        """
+        with self._lock.read():
+            entries = self.state.history.get(account, [])
+            return list(entries[-limit:] if limit else entries)
+    
+    def pending_status(self):
+        """
+        Return (pending transaction count, seconds the oldest one has waited)
+        """
+        with self._lock.read():
+            count = len(self.pending_transactions)
+            if not count:
+                return 0, 0.0
+            if self._pending_since is None:
+                # Loaded from disk: arrival time unknown, treat as overdue
+                return count, float('inf')
+            return count, time.time() - self._pending_since
+    
+    def create_block_template(self, max_transactions=None, miner_address=None):
+        """
+        Build an unmined block on the current tip from the pending pool
+        :param max_transactions: Optional cap on transactions taken (oldest first)
+        :param miner_address: Optional account credited with MINING_REWARD
+        Returns None if there is nothing to mine. With a miner address the
+        block may hold only the reward, so balances can be bootstrapped.
+        """
+        with self._lock.read():
+            if not self.pending_transactions and not miner_address:
+                return None
+            transactions = list(self.pending_transactions[:max_transactions])
+            previous = self.chain[-1]
+        if miner_address:
+            reward = Transaction(COINBASE, miner_address, MINING_REWARD, previous.index + 1)
+            transactions.insert(0, reward.to_dict())
+        return Block(
+            index=previous.index + 1,
+            transactions=transactions,
             timestamp=time.time(),
-            previous_hash=self.last_block.hash
+            previous_hash=previous.hash
         )
+    
+    def mine_pending_transactions(self, miner_address=None):
+        """
+        Create a new block with pending transactions and mine it.
+        If another block extends the chain while mining, the attempt is
+        aborted and restarted on top of the new tip.
+        :param miner_address: Optional account credited with MINING_REWARD
+        """
+        while True:
+            # Subscribe before reading the tip so no append can slip past us
+            cancel_event = threading.Event()
+            listener = lambda block: cancel_event.set()
+            self.add_tip_listener(listener)
+            try:
+                new_block = self.create_block_template(miner_address=miner_address)
+                if new_block is None:
+                    print("⚠️  No transactions to mine!")
+                    return None
+                
+                # Mine the block with the current difficulty
+                mined = new_block.mine_block(self.difficulty, cancel_event)
+            finally:
+                self.remove_tip_listener(listener)
+            
+            if mined is not None and self.add_mined_block(new_block):
+                return new_block
+            print(f"🔄 Chain tip changed, restarting mining on block {self.last_block.index + 1}")
+    
+    def add_tip_listener(self, callback):
+        """
+        Register a callback invoked with each block appended to the chain.
+        Callbacks run on the appending thread and must not block.
+        """
+        with self._lock.write():
+            self._tip_listeners.append(callback)
+    
+    def remove_tip_listener(self, callback):
+        """Unregister a callback added with add_tip_listener"""
+        with self._lock.write():
+            if callback in self._tip_listeners:
+                self._tip_listeners.remove(callback)
+    
+    def add_mined_block(self, block):
+        """
+        Append a locally mined block if it still extends the current tip.
+        Returns False if another block won the race.
+        """
+        with self._lock.write():
+            if self.chain[-1].hash != block.previous_hash:
+                return False
+            self._append_block(block)
+            return True
+    
+    def _append_block(self, block):
+        """
+        Single append path for the chain. Caller must hold the write lock.
+        Updates the account state, drops mined transactions from the pending
+        pool and notifies listeners.
+        """
+        self.chain.append(block)
+        self.state.apply_block(block)
+        self._confirm(block)
+        self._drop_included([block])
         
-        # Mine the block with the current difficulty
-        new_block.mine_block(self.difficulty)
+        for listener in list(self._tip_listeners):
+            listener(block)
+    
+    def _confirm(self, block):
+        """
+        Index the txids of a newly appended block's transfers. Legacy
+        free-form text may legitimately repeat, so it is not indexed.
+        Caller holds the write lock.
+        """
+        txids = [transaction_id(tx) for tx in block.transactions or []
+                 if Transaction.from_dict(tx) is not None]
+        self._confirmed.update(txids)
+        self._confirmed_blocks.append(txids)
+        if len(self._confirmed_blocks) > CONFIRMED_WINDOW:
+            for txid in self._confirmed_blocks.popleft():
+                self._confirmed[txid] -= 1
+                if not self._confirmed[txid]:
+                    del self._confirmed[txid]
+    
+    def _index_confirmed(self):
+        """Rebuild the confirmed-txid index from the chain tail"""
+        self._confirmed = Counter()
+        self._confirmed_blocks = deque()
+        for block in self.chain[-CONFIRMED_WINDOW:]:
+            self._confirm(block)
+    
+    def is_confirmed(self, transaction):
+        """True if the transfer is in one of the recent blocks"""
+        with self._lock.read():
+            return self._confirmed[transaction_id(transaction)] > 0
+    
+    def _drop_included(self, blocks):
+        """
+        Remove transactions contained in blocks from the pending pool, keeping
+        those that arrived after a template was built. Caller holds the write lock.
+        """
+        included = Counter(
+            json.dumps(tx, sort_keys=True) for block in blocks for tx in block.transactions
+        )
+        remaining = []
+        for tx in self.pending_transactions:
+            key = json.dumps(tx, sort_keys=True)
+            if included[key] > 0:
+                included[key] -= 1
+            else:
+                remaining.append(tx)
+        self.pending_transactions = remaining
+        self._revalidate_pending()
+    
+    def replace_chain(self, new_chain):
+        """
+        Adopt a longer valid chain (longest-chain rule), reorganizing the
+        account state. Every block past the fork point must meet the
+        current difficulty. Transactions from abandoned blocks return to the pool.
+        :param new_chain: List of Block objects starting at genesis
+        Returns True if the chain was replaced.
+        """
+        with self._lock.write():
+            if len(new_chain) <= len(self.chain) or not self._is_valid_chain(new_chain):
+                return False
+            
+            fork = 0
+            while (fork < len(self.chain)
+                   and self.chain[fork].hash == new_chain[fork].hash):
+                fork += 1
+            for block in new_chain[max(fork, 1):]:
+                if not isinstance(block.transactions, list):
+                    # A peer must send every block past the fork with its body
+                    print(f"❌ Block {block.index}: Missing transactions")
+                    return False
+                if not block.hash.startswith("0" * self.difficulty):
+                    print(f"❌ Block {block.index}: Insufficient proof-of-work")
+                    return False
+            abandoned = [self._full_block(block) for block in self.chain[fork:]]
+            
+            if not self._reorganize_state(abandoned, new_chain, fork):
+                return False
+            
+            self.chain = list(new_chain)
+            self._index_confirmed()
+            if fork <= self.pruned_height:
+                # The replaced range came back with bodies; prune it again later
+                self.pruned_height = SegmentStore.segment_start(fork) - 1
+            orphaned = []
+            for block in abandoned:
+                if block.index == 0:
+                    continue  # A different genesis carries no real transactions
+                for data in block.transactions or []:
+                    tx = Transaction.from_dict(data)
+                    if tx is None or not tx.is_coinbase:
+                        orphaned.append(data)
+            self.pending_transactions = orphaned + self.pending_transactions
+            self._drop_included(new_chain[fork:])
+            print(f"🔀 Reorganized: {len(abandoned)} blocks replaced, new length {len(self.chain)}")
+            
+            for listener in list(self._tip_listeners):
+                listener(self.chain[-1])
+            return True
+    
+    def _reorganize_state(self, abandoned, new_chain, fork):
+        """
+        Roll the state back to the fork point and apply the new branch.
+        Restores the original state and returns False if the branch is
+        invalid, and before re-raising any unexpected error.
+        """
+        switched = None
+        try:
+            switched = self._switch_branch(abandoned, new_chain, fork)
+            return switched
+        finally:
+            if switched is None:
+                # The index is somewhere between the branches; rebuild it
+                self.state = self._replay_state(self.chain)
+
+    def _switch_branch(self, abandoned, new_chain, fork):
+        """State half of a reorg; see _reorganize_state"""
+        for block in reversed(abandoned):
+            if not self.state.revert_block(block):
+                # Deeper than the undo journal: rebuild the common prefix
+                self.state = self._replay_state(new_chain[:fork])
+                break
         
-        self.chain.append(new_block)
-        self.pending_transactions = []
-        return new_block
+        for i, block in enumerate(new_chain[fork:]):
+            if not self.state.check_block(block, MINING_REWARD):
+                for applied in reversed(new_chain[fork:fork + i]):
+                    self.state.revert_block(applied)
+                if self.state.height != fork - 1:
+                    self.state = self._replay_state(self.chain[:fork])
+                for old_block in abandoned:
+                    self.state.apply_block(old_block)
+                return False
+            self.state.apply_block(block)
+        return True
+    
+    def _replay_state(self, blocks, state=None):
+        """Build an account state by applying blocks in order"""
+        state = state or AccountState()
+        for block in blocks:
+            block = self._full_block(block)
+            if block.transactions is None:
+                print(f"❗ Block {block.index} was pruned without archive; account state is incomplete")
+                block = Block(block.index, [], block.timestamp, block.previous_hash)
+            state.apply_block(block)
+        return state
+    
+    def _full_block(self, block):
+        """
+        Return block with its transactions, decompressing them from cold
+        storage if it was pruned. Takes no lock.
+        """
+        if block.transactions is not None or self.segments is None:
+            return block
+        transactions = self.segments.load_transactions(block.index)
+        if transactions is None:
+            return block
+        full = Block(block.index, transactions, block.timestamp, block.previous_hash)
+        full.nonce = block.nonce
+        full.hash = block.hash
+        if full.calculate_hash() != block.hash:
+            print(f"❗ Archived body of block {block.index} does not match its hash")
+            return block
+        return full
+    
+    def get_block(self, index):
+        """
+        Return the block at a height, loading a pruned body lazily
+        Returns None if the height is out of range.
+        """
+        with self._lock.read():
+            if not 0 <= index < len(self.chain):
+                return None
+            block = self.chain[index]
+        return self._full_block(block)
+    
+    def full_block(self, block):
+        """
+        Return a block taken from snapshot() with its body, loading a
+        pruned body lazily like get_block
+        """
+        return self._full_block(block)
+    
+    def iter_blocks(self, start=0, stop=None):
+        """Yield blocks start..stop-1 with bodies, one at a time"""
+        stop = len(self.chain) if stop is None else min(stop, len(self.chain))
+        for index in range(max(start, 0), stop):
+            yield self.get_block(index)
+    
+    def can_serve_from(self, start):
+        """True if full blocks from height start onwards are available"""
+        return self.archive or start > self.pruned_height
+    
+    def enable_pruning(self, prune_depth, archive=True, compression='lzma'):
+        """
+        Switch to pruned mode; bodies are moved out on the next save
+        :param prune_depth: Recent blocks whose bodies stay in memory (None disables)
+        """
+        with self._lock.write():
+            self.prune_depth = prune_depth
+            self.archive = archive
+            self.compression = compression
+    
+    def prune(self, filename="blockchain.json"):
+        """
+        Move transaction bodies older than prune_depth blocks out of memory,
+        one SEGMENT_SIZE segment at a time. Headers always stay.
+        Returns the number of blocks pruned.
+        """
+        if self.prune_depth is None:
+            return 0
+        if self.segments is None:
+            self.segments = SegmentStore(segment_directory(filename), self.compression)
+        
+        segments = []
+        with self._lock.read():
+            cutoff = self.chain[-1].index - self.prune_depth
+            start = self.pruned_height + 1
+            while start + SEGMENT_SIZE - 1 <= cutoff:
+                bodies = [self.chain[i].transactions for i in range(start, start + SEGMENT_SIZE)]
+                segments.append((start, bodies))
+                start += SEGMENT_SIZE
+            checkpoint = self.state.to_dict() if segments else None
+        if not segments:
+            return 0
+        
+        # Checkpoint first so the account state never needs these bodies again
+        AccountState.save_checkpoint(checkpoint, checkpoint_filename(filename))
+        self._checkpoint_height = checkpoint['height']
+        if self.archive:
+            for start, bodies in segments:
+                self.segments.write_segment(start, bodies)
+        
+        with self._lock.write():
+            first = segments[0][0]
+            last = segments[-1][0] + SEGMENT_SIZE - 1
+            for block in self.chain[first:last + 1]:
+                block.transactions = None
+            self.pruned_height = last
+        action = "archived" if self.archive else "discarded"
+        print(f"🗜️  Pruned blocks {first}-{last} (bodies {action})")
+        return last - first + 1
     
     def add_block_from_peer(self, block_data):
         """
         Add a block received from a peer
         :param block_data: Dictionary with block properties
+        Returns the result of link_block.
         """
-        new_block = Block(
-            index=block_data['index'],
-            transactions=block_data['transactions'],
-            timestamp=block_data['timestamp'],
-            previous_hash=block_data['previous_hash']
-        )
-        new_block.hash = block_data['hash']
-        new_block.nonce = block_data['nonce']
-        
-        # Validate and add to chain
-        if self.is_chain_valid() and self.last_block.hash == new_block.previous_hash:
-            self.chain.append(new_block)
-            return True
+        return self.link_block(Block.from_dict(block_data))
+    
+    def link_block(self, block, hash_checked=False):
+        """
+        Append a peer block if it extends the current tip. Only the new
+        block is validated against its parent, not the whole chain, and
+        it must meet the current difficulty.
+        :param hash_checked: Caller already verified the block hash
+        Returns True if appended, None if the block does not extend the
+        current tip (stale, e.g. it lost a race with a local block), or
+        False if the block is invalid.
+        """
+        with self._lock.write():
+            previous = self.chain[-1]
+            if block.previous_hash != previous.hash:
+                return None
+            if not isinstance(block.transactions, list):
+                print(f"❌ Block {block.index}: Missing transactions")
+                return False
+            if (self._is_valid_successor(previous, block, check_hash=not hash_checked,
+                                         difficulty=self.difficulty)
+                    and self.state.check_block(block, MINING_REWARD)):
+                self._append_block(block)
+                return True
         return False
     
     @property
     def last_block(self):
         """Get the most recent block in the chain"""
-        return self.chain[-1]
+        with self._lock.read():
+            return self.chain[-1]
     
-    def to_dict(self):
-        """Serialize blockchain to JSON-serializable format"""
+    def snapshot(self):
+        """Return a consistent copy of the block list for readers"""
+        with self._lock.read():
+            return list(self.chain)
+    
+    def get_pending(self):
+        """Return a copy of the pending transaction pool"""
+        with self._lock.read():
+            return list(self.pending_transactions)
+    
+    def _header(self):
+        """Chain settings stored ahead of the blocks; caller holds a lock"""
         return {
+            "hash_version": HASH_VERSION,
             "difficulty": self.difficulty,
-            "chain": [block.__dict__ for block in self.chain],
-            "pending_transactions": self.pending_transactions
+            "prune_depth": self.prune_depth,
+            "archive": self.archive,
+            "compression": self.compression,
+            "pruned_height": self.pruned_height,
+            "length": len(self.chain),
+            "pending_transactions": list(self.pending_transactions)
         }
     
+    def to_dict(self):
+        """Serialize blockchain to JSON-serializable format"""
+        with self._lock.read():
+            return dict(self._header(), chain=[dict(block.__dict__) for block in self.chain])
+    
     def save_to_file(self, filename="blockchain.json"):
-        """Save blockchain to JSON file"""
-        with open(filename, 'w') as f:
-            json.dump(self.to_dict(), f, indent=2)
+        """
+        Save blockchain to JSON file, plus an account-state checkpoint
+        every CHECKPOINT_INTERVAL blocks. In pruned mode old bodies are
+        moved to cold segments first. Blocks are written one per line so
+        the file can be read back as a stream.
+        """
+        self.prune(filename)
+        checkpoint = None
+        with self._lock.read():
+            header = self._header()
+            blocks = list(self.chain)
+            if self.state.height - self._checkpoint_height >= CHECKPOINT_INTERVAL:
+                checkpoint = self.state.to_dict()
+        with self._save_lock:
+            # Write then rename so concurrent readers never see a partial file
+            tmp_filename = filename + ".tmp"
+            with open(tmp_filename, 'w') as f:
+                write_chain_file(f, header, (dict(block.__dict__) for block in blocks))
+            os.replace(tmp_filename, filename)
+            if checkpoint:
+                AccountState.save_checkpoint(checkpoint, checkpoint_filename(filename))
+                self._checkpoint_height = checkpoint['height']
     
     @classmethod
     def load_from_file(cls, filename="blockchain.json"):
         """Load blockchain from JSON file"""
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
+            data, blocks = iter_chain_file(filename)
             
             # Create new blockchain instance
-            bc = cls(difficulty=data.get('difficulty', 2))
-            bc.pending_transactions = data.get('pending_transactions', [])
+            bc = cls(
+                difficulty=data.get('difficulty', 2),
+                prune_depth=data.get('prune_depth'),
+                archive=data.get('archive', True),
+                compression=data.get('compression', 'lzma')
+            )
+            bc.pruned_height = data.get('pruned_height', -1)
+            bc.segments = SegmentStore(segment_directory(filename), bc.compression)
             
             # Reconstruct blocks
             bc.chain = []
-            for block_data in data['chain']:
-                block = Block(
-                    index=block_data['index'],
-                    transactions=block_data['transactions'],
-                    timestamp=block_data['timestamp'],
-                    previous_hash=block_data['previous_hash']
-                )
-                block.nonce = block_data['nonce']
-                block.hash = block_data['hash']
-                bc.chain.append(block)
+            for block_data in blocks:
+                bc.chain.append(Block.from_dict(block_data))
             
+            bc._load_state(checkpoint_filename(filename))
+            bc._index_confirmed()
+            bc.pending_transactions = data.get('pending_transactions', [])
+            bc._revalidate_pending()
             return bc
         except FileNotFoundError:
             # Return new blockchain if file doesn't exist
             return cls()
     
+    def _load_state(self, checkpoint_file):
+        """
+        Restore the account state from the latest checkpoint that is still
+        on this chain, replaying only the blocks after it
+        """
+        state = AccountState.load_checkpoint(checkpoint_file)
+        if (state is not None and 0 <= state.height < len(self.chain)
+                and self.chain[state.height].hash == state.tip_hash):
+            self._checkpoint_height = state.height
+            self.state = self._replay_state(self.chain[state.height + 1:], state)
+        else:
+            self.state = self._replay_state(self.chain)
+    
     def __repr__(self):
         return f"Blockchain<blocks={len(self.chain)}, pending_tx={len(self.pending_transactions)}, difficulty={self.difficulty}>"
 
@@ -130,40 +624,64 @@ class Blockchain:
         Verify the integrity of the entire blockchain
         Returns True if valid, False otherwise
         """
+        return self._is_valid_chain(self.snapshot(), allow_pruned=True)
+    
+    def _is_valid_chain(self, chain, allow_pruned=False):
+        """
+        Validate a list of blocks; takes no lock
+        :param allow_pruned: Skip the hash check of local blocks without
+                             bodies; their linkage is still verified
+        """
         # Check genesis block
-        genesis = self.chain[0]
+        genesis = chain[0]
         if genesis.index != 0:
             print("❗ Invalid genesis block index")
             return False
         if genesis.previous_hash != "0":
             print("❗ Genesis block has invalid previous hash")
             return False
-        if genesis.hash != genesis.calculate_hash():
+        if not (allow_pruned and genesis.transactions is None) and genesis.hash != genesis.calculate_hash():
             print("❗ Genesis block hash invalid")
             return False
         
         # Check subsequent blocks
-        for i in range(1, len(self.chain)):
-            current = self.chain[i]
-            previous = self.chain[i-1]
-            
-            # Validate block linkage
-            if current.previous_hash != previous.hash:
-                print(f"❌ Block {i}: Broken link to previous block")
-                return False
-                
-            # Validate current block's hash
-            if current.hash != current.calculate_hash():
-                print(f"❌ Block {i}: Corrupted block data")
-                return False
-                
-            # Validate index sequence
-            if current.index != i:
-                print(f"❌ Block {i}: Invalid index {current.index}")
+        for i in range(1, len(chain)):
+            check_hash = not (allow_pruned and chain[i].transactions is None)
+            if not self._is_valid_successor(chain[i-1], chain[i], check_hash):
                 return False
                 
         return True
     
+    @staticmethod
+    def _is_valid_successor(previous, current, check_hash=True, difficulty=None):
+        """
+        Validate one block against its parent
+        :param difficulty: Leading zeros the hash must have (None skips the check)
+        """
+        i = previous.index + 1
+        
+        # Validate block linkage
+        if current.previous_hash != previous.hash:
+            print(f"❌ Block {i}: Broken link to previous block")
+            return False
+            
+        # Validate current block's hash
+        if check_hash and current.hash != current.calculate_hash():
+            print(f"❌ Block {i}: Corrupted block data")
+            return False
+            
+        # Validate index sequence
+        if current.index != i:
+            print(f"❌ Block {i}: Invalid index {current.index}")
+            return False
+        
+        # Validate proof-of-work
+        if difficulty is not None and not current.hash.startswith("0" * difficulty):
+            print(f"❌ Block {i}: Insufficient proof-of-work")
+            return False
+        
+        return True
+    
     def tamper_test(self):
         """
         Demonstrate blockchain tamper detection
@@ -196,7 +714,8 @@ class Blockchain:
         Adjust the mining difficulty
         :param new_difficulty: New number of leading zeros required
         """
-        self.difficulty = new_difficulty
+        with self._lock.write():
+            self.difficulty = new_difficulty
         print(f"🔧 Difficulty adjusted to {new_difficulty}")
 
 # Test the blockchain with mining
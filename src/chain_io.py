@@ -0,0 +1,236 @@
+import json
+import os
+import struct
+from block import Block, HASH_VERSION
+from state import AccountState
+
+CHAIN_MARKER = ', "chain": ['  # Ends the header line of a streamed chain file
+BINARY_MAGIC = b"MBC2"
+RECORD_HEADER = struct.Struct("<QdQ")  # index, timestamp, nonce
+LENGTH = struct.Struct("<I")
+
+class ChainFileError(ValueError):
+    """A chain file written with block hashes this version cannot verify"""
+
+def write_chain_file(f, header, blocks):
+    """
+    Write a chain file one block per line so it can be read back as a stream.
+    The result is still a single valid JSON document.
+
+    :param header: Dictionary of chain settings (difficulty, pending, ...)
+    :param blocks: Iterable of block dictionaries
+    """
+    f.write(json.dumps(header)[:-1] + CHAIN_MARKER + "\n")
+    for position, block_data in enumerate(blocks):
+        if position:
+            f.write(",\n")
+        f.write(json.dumps(block_data))
+    f.write("\n]}\n")
+
+def iter_chain_file(filename):
+    """
+    Return (header, iterator of block dictionaries) for a chain file.
+    Streamed files are read line by line; older pretty-printed files are
+    loaded whole as a fallback.
+    """
+    f = open(filename, 'r')
+    first_line = f.readline()
+    if not first_line.rstrip("\n").endswith(CHAIN_MARKER):
+        f.seek(0)
+        data = json.load(f)
+        f.close()
+        _check_hash_version(data, filename)
+        chain = data.pop('chain')
+        data.setdefault('length', len(chain))
+        return data, iter(chain)
+
+    header = json.loads(first_line.rstrip("\n")[:-len(CHAIN_MARKER)] + "}")
+    try:
+        _check_hash_version(header, filename)
+    except ChainFileError:
+        f.close()
+        raise
+
+    def blocks():
+        with f:
+            for line in f:
+                line = line.rstrip("\n").rstrip(",")
+                if line.startswith("]"):
+                    return
+                yield json.loads(line)
+    return header, blocks()
+
+def _check_hash_version(header, filename):
+    """
+    Refuse chain files from before the current block hash rule. They
+    cannot be migrated: every hash would change and lose its proof-of-work.
+    """
+    version = header.get('hash_version', 1)
+    if version != HASH_VERSION:
+        raise ChainFileError(
+            f"{filename} uses block hash version {version} but this release verifies "
+            f"version {HASH_VERSION}; its proof-of-work cannot be carried over, so move "
+            f"the file aside to start a new chain")
+
+def write_jsonl(f, header, blocks):
+    """Export format: a header line followed by one block per line"""
+    f.write(json.dumps(dict(header, format="mini-blockchain")) + "\n")
+    count = 0
+    for block_data in blocks:
+        f.write(json.dumps(block_data) + "\n")
+        count += 1
+    return count
+
+def write_binary(f, header, blocks):
+    """
+    Export format: magic, length-prefixed JSON header, then one
+    length-prefixed record per block with fixed-width numeric fields
+    """
+    f.write(BINARY_MAGIC)
+    encoded = json.dumps(header).encode()
+    f.write(LENGTH.pack(len(encoded)) + encoded)
+    count = 0
+    for block_data in blocks:
+        record = RECORD_HEADER.pack(block_data['index'], block_data['timestamp'], block_data['nonce'])
+        for text in (block_data['previous_hash'], block_data.get('tx_root') or "", block_data['hash']):
+            encoded = text.encode()
+            record += bytes([len(encoded)]) + encoded
+        record += json.dumps(block_data['transactions']).encode()
+        f.write(LENGTH.pack(len(record)) + record)
+        count += 1
+    return count
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated chain dump")
+    return data
+
+def _iter_binary(f):
+    while True:
+        prefix = f.read(LENGTH.size)
+        if not prefix:
+            return
+        record = _read_exact(f, LENGTH.unpack(prefix)[0])
+        index, timestamp, nonce = RECORD_HEADER.unpack_from(record)
+        offset = RECORD_HEADER.size
+        texts = []
+        for _ in range(3):
+            size = record[offset]
+            texts.append(record[offset + 1:offset + 1 + size].decode())
+            offset += 1 + size
+        yield {
+            'index': index,
+            'transactions': json.loads(record[offset:]),
+            'timestamp': timestamp,
+            'previous_hash': texts[0],
+            'nonce': nonce,
+            'tx_root': texts[1] or None,
+            'hash': texts[2]
+        }
+
+def open_dump(path):
+    """
+    Open an exported chain, detecting its format
+    Returns (header, iterator of block dictionaries); the file closes when
+    the iterator is exhausted.
+    """
+    f = open(path, 'rb')
+    magic = f.read(len(BINARY_MAGIC))
+    if magic == b"MBC1":
+        f.close()
+        raise ValueError("dump predates transaction roots in block hashes; export it again")
+    if magic == BINARY_MAGIC:
+        size = LENGTH.unpack(_read_exact(f, LENGTH.size))[0]
+        header = json.loads(_read_exact(f, size))
+        records = _iter_binary(f)
+    else:
+        f.seek(0)
+        header = json.loads(f.readline())
+        records = (json.loads(line) for line in f if line.strip())
+
+    def blocks():
+        with f:
+            yield from records
+    return header, blocks()
+
+def export_chain(blocks, path, fmt, header):
+    """
+    Stream blocks to an export file
+    :param fmt: 'jsonl' or 'binary'
+    Returns the number of blocks written.
+    """
+    if fmt == 'binary':
+        with open(path, 'wb') as f:
+            return write_binary(f, header, blocks)
+    with open(path, 'w') as f:
+        return write_jsonl(f, header, blocks)
+
+def import_chain(path, filename, max_reward, batch_size=1000, min_difficulty=None):
+    """
+    Validate an exported chain while streaming it into a chain file.
+    Only the previous block and the account balances are kept in memory.
+    Blocks are flushed to a temporary file in batches; the chain file is
+    replaced only once the whole dump has validated.
+
+    :param max_reward: Largest coinbase amount a block may pay
+    :param min_difficulty: Leading zeros every non-genesis hash must have at
+                           least; the dump can only ask for more
+    Returns the number of blocks imported, or None if validation failed.
+    """
+    try:
+        header, blocks = open_dump(path)
+    except ValueError as e:
+        print(f"❌ Import failed: {e}")
+        return None
+    difficulty = max(header.get('difficulty', 2), min_difficulty or 0)
+    prefix = "0" * difficulty
+    tmp_filename = filename + ".import"
+    state = AccountState(max_undo_depth=0)
+    imported = 0
+    previous = None
+
+    def validated():
+        nonlocal imported, previous
+        for block_data in blocks:
+            block = Block.from_dict(block_data)
+            if not isinstance(block.transactions, list):
+                raise ValueError(f"Block {block.index}: missing transactions")
+            if previous is None:
+                if block.index != 0 or block.previous_hash != "0" or block.hash != block.calculate_hash():
+                    raise ValueError("Dump does not start with a valid genesis block")
+            else:
+                if block.previous_hash != previous.hash or block.index != previous.index + 1:
+                    raise ValueError(f"Block {block.index}: broken link to previous block")
+                if block.hash != block.calculate_hash():
+                    raise ValueError(f"Block {block.index}: corrupted block data")
+                if not block.hash.startswith(prefix):
+                    raise ValueError(f"Block {block.index}: insufficient proof-of-work")
+            if not state.check_block(block, max_reward):
+                raise ValueError(f"Block {block.index}: transactions do not apply")
+            state.apply_block(block)
+            previous = Block(block.index, None, block.timestamp, block.previous_hash)
+            previous.hash = block.hash
+            yield block_data
+            imported += 1
+            if imported % batch_size == 0:
+                f.flush()
+                os.fsync(f.fileno())
+                print(f"📥 Imported {imported} blocks...")
+
+    try:
+        with open(tmp_filename, 'w') as f:
+            write_chain_file(f, {'hash_version': HASH_VERSION, 'difficulty': difficulty,
+                                 'pending_transactions': []}, validated())
+            f.flush()
+            os.fsync(f.fileno())
+    except (ValueError, KeyError, TypeError, struct.error) as e:
+        print(f"❌ Import failed after {imported} blocks: {e}")
+        os.remove(tmp_filename)
+        return None
+    if not imported:
+        print("❌ Import failed: dump contains no blocks")
+        os.remove(tmp_filename)
+        return None
+    os.replace(tmp_filename, filename)
+    return imported
@@ -0,0 +1,36 @@
+import os
+import re
+
+DEFAULT_CHAIN = "default"
+CHAINS_DIRECTORY = "chains"  # Holds one storage directory per named chain
+CHAIN_NAME = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+def is_valid_chain_name(name):
+    return bool(CHAIN_NAME.match(name))
+
+def chain_directory(name):
+    """
+    Storage directory of a chain. The default chain keeps the original
+    layout in the working directory so existing files keep working.
+    """
+    if name == DEFAULT_CHAIN:
+        return ""
+    return os.path.join(CHAINS_DIRECTORY, name)
+
+def chain_exists(name):
+    """True once a command has written to the chain (the default always exists)"""
+    directory = chain_directory(name)
+    return not directory or os.path.isdir(directory)
+
+def create_chain_directory(name):
+    directory = chain_directory(name)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+def chain_filename(name):
+    """Chain file of a named chain; its checkpoint and segments sit beside it"""
+    return os.path.join(chain_directory(name), "blockchain.json")
+
+def headers_filename(name):
+    """Header file of a named chain in light mode"""
+    return os.path.join(chain_directory(name), "headers.dat")
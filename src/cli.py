@@ -2,29 +2,41 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__))) 
 import argparse
-from blockchain import Blockchain
-from p2p_network import Node
+from blockchain import Blockchain, MINING_REWARD
+from block import Block
+from p2p_network import Node, ChainHost
+from transaction import Transaction
+from chain_io import iter_chain_file, export_chain, import_chain, ChainFileError
+from storage import SegmentStore, segment_directory
+from headers import HeaderChain
+from light_node import LightNode
+from chains import (DEFAULT_CHAIN, is_valid_chain_name, chain_exists, create_chain_directory,
+                    chain_filename, headers_filename)
 import json
 import time
 import pickle
 
-def save_node_state(node):
+# Commands that write a chain's files; only these create a new chain's directory
+WRITE_COMMANDS = {'add', 'transfer', 'mine', 'difficulty', 'prune', 'import'}
+
+def save_node_state(node, chains=(DEFAULT_CHAIN,)):
     """Save node state to file"""
     if node:
         with open('node_state.pkl', 'wb') as f:
             pickle.dump({
                 'host': node.host,
                 'port': node.port,
+                'chains': list(chains),
                 'is_running': True
             }, f)
 
-def load_node_state(bc):
-    """Load node state from file"""
+def load_node_state(bc, chain=DEFAULT_CHAIN):
+    """Load node state from file if the running node hosts the chain"""
     try:
         with open('node_state.pkl', 'rb') as f:
             state = pickle.load(f)
-            if state.get('is_running'):
-                node = Node(state['host'], state['port'], bc)
+            if state.get('is_running') and chain in state.get('chains', [DEFAULT_CHAIN]):
+                node = Node(state['host'], state['port'], bc, chain_id=chain)
                 return node
     except FileNotFoundError:
         pass
@@ -37,35 +49,229 @@ def clear_node_state():
     except FileNotFoundError:
         pass
 
+def add_transfer(bc, sender, recipient, amount, node=None, filename="blockchain.json"):
+    """
+    Create a structured transfer with the sender's next nonce and queue it
+    If a node is running the transfer is also gossiped to peers.
+    """
+    tx = Transaction(sender, recipient, amount, bc.next_nonce(sender))
+    if node:
+        block_index = node.submit_transaction(tx)
+    else:
+        block_index = bc.add_transaction(tx)
+    if block_index is not None:
+        bc.save_to_file(filename)
+        print(f"✅ {sender} -> {recipient}: {amount} queued (nonce {tx.nonce}, block {block_index})")
+    return block_index
+
+def print_balance(bc, account):
+    """Print an account balance from the state index"""
+    print(f"💰 {account}: {bc.get_balance(account)} (next nonce {bc.next_nonce(account)})")
+
+def print_history(bc, account, limit=None):
+    """Print the confirmed transfers of an account from the state index"""
+    entries = bc.get_history(account, limit)
+    if not entries:
+        print(f"📜 No confirmed transactions for {account}")
+        return
+    print(f"📜 History for {account}:")
+    for height, txid, sender, recipient, amount in entries:
+        sign = "-" if sender == account else "+"
+        print(f"  Block {height}: {sign}{amount} {sender} -> {recipient} ({txid[:12]}...)")
+
+def stream_blocks(filename="blockchain.json", start=0, end=None, limit=None):
+    """
+    Yield block dictionaries with index in [start, end] straight from the
+    chain file, at most limit of them, restoring archived bodies lazily.
+    Only one block is held in memory at a time.
+    Returns (header, iterator).
+    """
+    try:
+        header, blocks = iter_chain_file(filename)
+    except FileNotFoundError:
+        data = Blockchain().to_dict()
+        header, blocks = data, iter(data.pop('chain'))
+    segments = SegmentStore(segment_directory(filename))
+    
+    def selected():
+        shown = 0
+        for block_data in blocks:
+            if block_data['index'] < start:
+                continue
+            if (end is not None and block_data['index'] > end) or (limit is not None and shown >= limit):
+                break
+            if block_data['transactions'] is None:
+                block_data['transactions'] = segments.load_transactions(block_data['index'])
+            shown += 1
+            yield block_data
+    return header, selected()
+
+def print_headers(headers, start=0, end=None, limit=None):
+    """Print stored headers with index in [start, end], at most limit of them"""
+    stop = len(headers) if end is None else end + 1
+    if limit is not None:
+        stop = min(stop, start + limit)
+    print(f"\n🪶 Header chain (length: {len(headers)}, difficulty: {headers.difficulty}, "
+          f"{headers.memory_usage()} bytes)")
+    for header in headers.iter_headers(start, stop):
+        print(f"\nBlock {header['index']}:")
+        print(f"  Hash: {header['hash']}")
+        print(f"  Prev: {header['previous_hash'][:16]}...")
+        print(f"  Nonce: {header['nonce']}")
+        print(f"  Timestamp: {time.ctime(header['timestamp'])}")
+
+def print_block(block):
+    """Print a full block fetched on demand"""
+    print(f"\nBlock {block.index}:")
+    print(f"  Hash: {block.hash}")
+    print(f"  Transactions: {len(block.transactions)}")
+    for j, tx in enumerate(block.transactions):
+        print(f"    TX{j}: {tx}")
+
+def run_light(args, filename="headers.dat"):
+    """
+    Run a command against the headers-only chain. Commands that need
+    transaction data are refused.
+    """
+    headers = HeaderChain.load_from_file(filename)
+    
+    if args.command == 'view':
+        if args.full:
+            print("ℹ️  Light mode stores headers only; use 'block HEIGHT' in a running light node")
+        print_headers(headers, args.start, args.end, args.limit)
+    
+    elif args.command == 'validate':
+        status = "✅ VALID" if headers.is_valid() else "❌ INVALID"
+        print(f"\nHeader chain validation: {status}")
+    
+    elif args.command == 'difficulty':
+        if 1 <= args.level <= 5:
+            headers.difficulty = args.level
+            headers.save_to_file(filename)
+            print(f"🔧 Minimum header difficulty set to {args.level}")
+        else:
+            print("⚠️  Difficulty must be between 1-5")
+    
+    elif args.command == 'network' and args.net_command == 'start':
+        node = LightNode(args.host, args.port, headers, filename, max_outbound=args.max_outbound,
+                         chain_id=args.chain)
+        node.start()
+        if not args.interactive:
+            node.stop()
+            return
+        print("\n=== Interactive Light Node Mode ===")
+        print("Commands:")
+        print("  connect <host> <port> - Connect to peer")
+        print("  sync               - Download new headers from peers")
+        print("  view [from] [to]   - Show headers")
+        print("  block <height>     - Fetch one full block from a full peer")
+        print("  peers              - Show connected peers")
+        print("  quit               - Stop node")
+        print()
+        try:
+            while True:
+                cmd = input(f"Light-{args.port}> ").strip().split()
+                if not cmd:
+                    continue
+                if cmd[0] == 'quit':
+                    break
+                elif cmd[0] == 'connect' and len(cmd) == 3:
+                    node.connect_to_peer(cmd[1], int(cmd[2]))
+                elif cmd[0] == 'sync':
+                    node.sync_headers()
+                    headers.save_to_file(filename)
+                elif cmd[0] == 'view':
+                    bounds = [int(value) for value in cmd[1:3]]
+                    print_headers(headers, *bounds)
+                elif cmd[0] == 'block' and len(cmd) == 2:
+                    block = node.fetch_block(int(cmd[1]))
+                    if block:
+                        print_block(block)
+                    else:
+                        print(f"❌ No full peer could serve block {cmd[1]}")
+                elif cmd[0] == 'peers':
+                    print(f"Connected peers: {list(node.peers)}")
+                else:
+                    print("Unknown command or wrong arguments")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            node.stop()
+    
+    elif args.command:
+        print(f"⚠️  '{args.command}' needs full blocks and is not available in light mode")
+    else:
+        print("⚠️  Light mode supports: view, validate, difficulty, network start")
+
 def main():
-    # Load existing blockchain or create new one
-    bc = Blockchain.load_from_file()
-    node = load_node_state(bc)
     parser = argparse.ArgumentParser(description='Mini Blockchain CLI')
+    parser.add_argument('--light', action='store_true',
+                        help='Use the headers-only chain in headers.dat (low memory)')
     
     subparsers = parser.add_subparsers(dest='command')
     
+    # Every command takes --chain to pick one of the chains stored side by side
+    chain_parent = argparse.ArgumentParser(add_help=False)
+    chain_parent.add_argument('--chain', default=DEFAULT_CHAIN, metavar='NAME',
+                              help=f'Chain to operate on (default: {DEFAULT_CHAIN})')
+    
     # Add transaction command
-    add_parser = subparsers.add_parser('add', help='Add a transaction')
+    add_parser = subparsers.add_parser('add', help='Add a transaction', parents=[chain_parent])
     add_parser.add_argument('transaction', help='Transaction content')
     
+    # Structured transfer command
+    transfer_parser = subparsers.add_parser('transfer', help='Add a structured transfer', parents=[chain_parent])
+    transfer_parser.add_argument('sender', help='Paying account')
+    transfer_parser.add_argument('recipient', help='Receiving account')
+    transfer_parser.add_argument('amount', type=int, help='Whole number of coins')
+    
     # Mine command
-    subparsers.add_parser('mine', help='Mine pending transactions')
+    mine_parser = subparsers.add_parser('mine', help='Mine pending transactions', parents=[chain_parent])
+    mine_parser.add_argument('--reward-to', help='Account credited with the mining reward')
+    
+    # Account queries
+    balance_parser = subparsers.add_parser('balance', help='Show account balance', parents=[chain_parent])
+    balance_parser.add_argument('account', help='Account name')
+    history_parser = subparsers.add_parser('history', help='Show account transaction history', parents=[chain_parent])
+    history_parser.add_argument('account', help='Account name')
+    history_parser.add_argument('--limit', type=int, help='Only show the latest N entries')
     
     # View chain command
-    view_parser = subparsers.add_parser('view', help='View blockchain')
+    view_parser = subparsers.add_parser('view', help='View blockchain', parents=[chain_parent])
     view_parser.add_argument('--full', action='store_true', help='Show full block details')
+    view_parser.add_argument('--from', dest='start', type=int, default=0, help='First block height')
+    view_parser.add_argument('--to', dest='end', type=int, help='Last block height')
+    view_parser.add_argument('--limit', type=int, help='Show at most N blocks')
+    
+    # Streaming export/import
+    export_parser = subparsers.add_parser('export', help='Export the chain as a stream', parents=[chain_parent])
+    export_parser.add_argument('file', help='Output file')
+    export_parser.add_argument('--format', choices=['jsonl', 'binary'], default='jsonl', help='Dump format')
+    export_parser.add_argument('--from', dest='start', type=int, default=0, help='First block height')
+    export_parser.add_argument('--to', dest='end', type=int, help='Last block height')
+    import_parser = subparsers.add_parser('import', help='Validate and import an exported chain', parents=[chain_parent])
+    import_parser.add_argument('file', help='Dump produced by export (jsonl or binary)')
+    import_parser.add_argument('--batch-size', type=int, default=1000, help='Blocks per committed batch')
+    import_parser.add_argument('--force', action='store_true', help='Replace a chain that already has blocks')
     
     # Validate command
-    subparsers.add_parser('validate', help='Validate blockchain integrity')
+    subparsers.add_parser('validate', help='Validate blockchain integrity', parents=[chain_parent])
     
     # Tamper test command
-    subparsers.add_parser('tamper-test', help='Run tamper detection demo')
+    subparsers.add_parser('tamper-test', help='Run tamper detection demo', parents=[chain_parent])
     
     # Difficulty adjustment
-    diff_parser = subparsers.add_parser('difficulty', help='Adjust mining difficulty')
+    diff_parser = subparsers.add_parser('difficulty', help='Adjust mining difficulty', parents=[chain_parent])
     diff_parser.add_argument('level', type=int, help='New difficulty level (1-5)')
     
+    # Pruned storage mode
+    prune_parser = subparsers.add_parser('prune', help='Keep only recent transaction bodies', parents=[chain_parent])
+    prune_parser.add_argument('depth', type=int, help='Recent blocks that keep their transactions')
+    prune_parser.add_argument('--discard', action='store_true',
+                              help='Drop old bodies instead of archiving them compressed')
+    prune_parser.add_argument('--compression', choices=['lzma', 'zlib'], default='lzma',
+                              help='Compression for archived segments')
+    
     # Network operations
     net_parser = subparsers.add_parser('network', help='Network operations')
     net_sub = net_parser.add_subparsers(dest='net_command')
@@ -74,50 +280,141 @@ def main():
     start_parser = net_sub.add_parser('start', help='Start node server')
     start_parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
     start_parser.add_argument('--port', type=int, default=5000, help='Port to listen on')
+    start_parser.add_argument('--chain', action='append', metavar='NAME',
+                              help='Chain to host; repeat to host several chains on one port')
     start_parser.add_argument('--interactive', action='store_true', help='Keep node running interactively')
+    start_parser.add_argument('--mine', action='store_true', help='Start the background miner with the node')
+    start_parser.add_argument('--max-latency', type=float, default=5.0,
+                              help='Seconds a transaction may wait before the miner cuts a block')
+    start_parser.add_argument('--miner-workers', type=int, default=None,
+                              help='Number of mining processes (default: CPU count)')
+    start_parser.add_argument('--reward-to', help='Account credited with mining rewards')
+    start_parser.add_argument('--prune', type=int, metavar='DEPTH',
+                              help='Run in pruned mode keeping DEPTH recent blocks with bodies')
+    start_parser.add_argument('--max-outbound', type=int, default=8, help='Peers to connect out to')
+    start_parser.add_argument('--max-inbound', type=int, default=16, help='Peers allowed to connect in')
+    start_parser.add_argument('--api-port', type=int, metavar='PORT',
+                              help='Serve the read-only HTTP/JSON query API on PORT (localhost)')
 
     # Connect to peer
-    connect_parser = net_sub.add_parser('connect', help='Connect to peer')
+    connect_parser = net_sub.add_parser('connect', help='Connect to peer', parents=[chain_parent])
     connect_parser.add_argument('peer_host', help='Peer host address')
     connect_parser.add_argument('peer_port', type=int, help='Peer port number')
 
     # Stop node
-    net_sub.add_parser('stop', help='Stop node server')
+    net_sub.add_parser('stop', help='Stop node server', parents=[chain_parent])
     
     # Node status
-    net_sub.add_parser('status', help='Check node status')
+    net_sub.add_parser('status', help='Check node status', parents=[chain_parent])
     
     args = parser.parse_args()
     
-    if args.command == 'add':
-        bc.add_transaction(args.transaction)
-        bc.save_to_file()  # Save after adding transaction
-        print(f"✅ Transaction added to pending pool (will be in block {len(bc.chain)})")
-        
-    elif args.command == 'mine':
-        start_time = time.time()
-        block = bc.mine_pending_transactions()
-        if block:
-            bc.save_to_file()  # Save after mining
-            print(f"⛏️  Mined block {block.index} in {time.time()-start_time:.4f}s")
-            print(f"   Hash: {block.hash}")
-            
-    elif args.command == 'view':
-        print(f"\n🔗 Blockchain (length: {len(bc.chain)}, difficulty: {bc.difficulty})")
-        print(f"⏳ Pending transactions: {len(bc.pending_transactions)}")
+    # 'network start' may host several chains; every other command uses one
+    chains = getattr(args, 'chain', None) or [DEFAULT_CHAIN]
+    if isinstance(chains, str):
+        chains = [chains]
+    writes = args.command in WRITE_COMMANDS or (
+        args.command == 'network' and args.net_command == 'start')
+    for name in chains:
+        if not is_valid_chain_name(name):
+            print(f"❌ Invalid chain name '{name}' (letters, digits, '-' and '_' only)")
+            return
+        if writes:
+            create_chain_directory(name)
+        elif not chain_exists(name):
+            print(f"❌ Unknown chain '{name}'")
+            return
+    args.chain = chains[0]
+    filename = chain_filename(args.chain)
+    
+    if args.light:
+        if len(chains) > 1:
+            print("⚠️  A light node follows one chain; hosting only " + args.chain)
+        run_light(args, headers_filename(args.chain))
+        return
+    
+    # Streaming commands read the chain file directly instead of loading it
+    if args.command == 'view':
+        header, blocks = stream_blocks(filename, start=args.start, end=args.end, limit=args.limit)
+        # Chains written by 'import' do not record their length up front
+        length = f"length: {header['length']}, " if 'length' in header else ""
+        print(f"\n🔗 Blockchain ({length}difficulty: {header.get('difficulty', 2)})")
+        print(f"⏳ Pending transactions: {len(header.get('pending_transactions', []))}")
         
-        for i, block in enumerate(bc.chain):
-            print(f"\nBlock {i}:")
+        for block_data in blocks:
+            block = Block.from_dict(block_data)
+            print(f"\nBlock {block.index}:")
             print(f"  Hash: {block.hash}")
             print(f"  Prev: {block.previous_hash[:16]}...")
             print(f"  Nonce: {block.nonce}")
             print(f"  Timestamp: {time.ctime(block.timestamp)}")
-            print(f"  Transactions: {len(block.transactions)}")
+            if block.transactions is None:
+                print("  Transactions: pruned")
+            else:
+                print(f"  Transactions: {len(block.transactions)}")
             
             if args.full:
-                for j, tx in enumerate(block.transactions):
+                for j, tx in enumerate(block.transactions or []):
                     print(f"    TX{j}: {tx}")
+        return
     
+    if args.command == 'export':
+        header, blocks = stream_blocks(filename, start=args.start, end=args.end)
+        
+        def checked(blocks):
+            for block_data in blocks:
+                if block_data['transactions'] is None:
+                    raise ValueError(f"block {block_data['index']} was pruned without archive")
+                yield block_data
+        
+        try:
+            count = export_chain(checked(blocks), args.file, args.format,
+                                 {'difficulty': header.get('difficulty', 2)})
+            print(f"📤 Exported {count} blocks to {args.file} ({args.format})")
+        except ValueError as e:
+            print(f"❌ Export failed: {e}")
+        return
+    
+    if args.command == 'import':
+        header, blocks = stream_blocks(filename, limit=2)
+        if len(list(blocks)) > 1 and not args.force:
+            print(f"❌ {filename} already has blocks; pass --force to replace it")
+            return
+        # The dump may raise the difficulty but never lower it below this chain's
+        count = import_chain(args.file, filename, MINING_REWARD, args.batch_size,
+                             min_difficulty=header.get('difficulty', 2))
+        if count is not None:
+            print(f"📥 Imported {count} blocks into {filename}")
+        return
+    
+    # Load existing blockchain or create new one
+    bc = Blockchain.load_from_file(filename)
+    node = load_node_state(bc, args.chain)
+    host = None  # ChainHost when several chains share the node
+    
+    if args.command == 'add':
+        block_index = bc.add_transaction(args.transaction)
+        if block_index is not None:
+            bc.save_to_file(filename)  # Save after adding transaction
+            print(f"✅ Transaction added to pending pool (will be in block {block_index})")
+        
+    elif args.command == 'transfer':
+        add_transfer(bc, args.sender, args.recipient, args.amount, filename=filename)
+        
+    elif args.command == 'balance':
+        print_balance(bc, args.account)
+        
+    elif args.command == 'history':
+        print_history(bc, args.account, args.limit)
+        
+    elif args.command == 'mine':
+        start_time = time.time()
+        block = bc.mine_pending_transactions(args.reward_to)
+        if block:
+            bc.save_to_file(filename)  # Save after mining
+            print(f"⛏️  Mined block {block.index} in {time.time()-start_time:.4f}s")
+            print(f"   Hash: {block.hash}")
+            
     elif args.command == 'validate':
         valid = bc.is_chain_valid()
         status = "✅ VALID" if valid else "❌ INVALID"
@@ -130,35 +427,84 @@ def main():
     elif args.command == 'difficulty':
         if 1 <= args.level <= 5:
             bc.adjust_difficulty(args.level)
-            bc.save_to_file()  # Save after difficulty change
+            bc.save_to_file(filename)  # Save after difficulty change
         else:
             print("⚠️  Difficulty must be between 1-5")
     
+    elif args.command == 'prune':
+        bc.enable_pruning(args.depth, archive=not args.discard, compression=args.compression)
+        bc.save_to_file(filename)  # Prunes eligible segments
+        print(f"🗜️  Pruned mode: keeping {args.depth} recent blocks (pruned up to block {bc.pruned_height})")
+    
     elif args.command == 'network':
         if args.net_command == 'start':
             if node:
                 print(f"⚠️  Node already running at {node.host}:{node.port}")
             else:
-                node = Node(args.host, args.port, bc)
-                node.start()
-                save_node_state(node)
+                if len(chains) > 1:
+                    # One socket and one shared worker pool for all chains
+                    host = ChainHost(
+                        args.host, args.port,
+                        {name: bc if name == args.chain else Blockchain.load_from_file(chain_filename(name))
+                         for name in chains},
+                        workers=args.miner_workers,
+                        max_outbound=args.max_outbound,
+                        max_inbound=args.max_inbound
+                    )
+                    node = host.nodes[args.chain]
+                    if args.prune is not None:
+                        for hosted in host.nodes.values():
+                            hosted.blockchain.enable_pruning(args.prune)
+                    host.start()
+                else:
+                    if args.prune is not None:
+                        bc.enable_pruning(args.prune)
+                    node = Node(args.host, args.port, bc,
+                                max_outbound=args.max_outbound, max_inbound=args.max_inbound,
+                                chain_id=args.chain)
+                    node.start()
+                save_node_state(node, chains)
                 print(f"🖥️  Node started at {args.host}:{args.port}")
+                hosted_nodes = list(host.nodes.values()) if host else [node]
+                if args.api_port:
+                    # One query endpoint per chain on consecutive ports
+                    for offset, hosted in enumerate(hosted_nodes):
+                        hosted.start_query_api(args.api_port + offset)
+                if args.mine:
+                    for hosted in hosted_nodes:
+                        hosted.start_miner(args.max_latency, args.miner_workers,
+                                           miner_address=args.reward_to)
                 
                 # Interactive mode to keep node running
                 if args.interactive:
                     print("\n=== Interactive Node Mode ===")
                     print("Commands:")
                     print("  add <transaction>   - Add transaction")
-                    print("  mine               - Mine pending transactions")
+                    print("  transfer <from> <to> <amount> - Add structured transfer")
+                    print("  balance <account>  - Show account balance")
+                    print("  history <account>  - Show account history")
+                    print("  mine [reward_to]   - Mine pending transactions")
+                    print("  miner start [latency] - Start background miner")
+                    print("  miner stop         - Stop background miner")
+                    print("  miner status       - Show background miner status")
                     print("  view               - View blockchain")
                     print("  connect <host> <port> - Connect to peer")
-                    print("  peers              - Show connected peers")
+                    print("  peers              - Show connected peers with scores")
+                    print("  discover           - Exchange addresses and fill outbound slots")
+                    print("  sync               - Fetch newer blocks from peers")
+                    print("  ingest             - Show block ingestion queue stats")
+                    print("  api                - Show query API cache stats")
+                    if host:
+                        print("  chains             - List hosted chains")
+                        print("  use <chain>        - Switch the chain commands apply to")
+                        print("  pool               - Show shared worker pool scheduling")
                     print("  quit               - Stop node")
                     print()
                     
                     try:
                         while True:
-                            cmd = input(f"Node-{args.port}> ").strip().split()
+                            prompt = f"Node-{args.port}" if node.chain_id == DEFAULT_CHAIN else f"Node-{args.port}[{node.chain_id}]"
+                            cmd = input(f"{prompt}> ").strip().split()
                             if not cmd:
                                 continue
                                 
@@ -166,20 +512,56 @@ def main():
                                 break
                             elif cmd[0] == 'add' and len(cmd) > 1:
                                 transaction = ' '.join(cmd[1:])
-                                bc.add_transaction(transaction)
-                                bc.save_to_file()
-                                print(f"✅ Transaction added: {transaction}")
+                                if node.submit_transaction(transaction) is not None:
+                                    bc.save_to_file(filename)
+                                    print(f"✅ Transaction added: {transaction}")
+                            elif cmd[0] == 'transfer' and len(cmd) == 4:
+                                add_transfer(bc, cmd[1], cmd[2], int(cmd[3]), node, filename)
+                            elif cmd[0] == 'balance' and len(cmd) == 2:
+                                print_balance(bc, cmd[1])
+                            elif cmd[0] == 'history' and len(cmd) == 2:
+                                print_history(bc, cmd[1])
                             elif cmd[0] == 'mine':
                                 start_time = time.time()
-                                block = bc.mine_pending_transactions()
+                                reward_to = cmd[1] if len(cmd) > 1 else args.reward_to
+                                block = bc.mine_pending_transactions(reward_to)
                                 if block:
-                                    bc.save_to_file()
+                                    bc.save_to_file(filename)
                                     print(f"⛏️  Mined block {block.index} in {time.time()-start_time:.4f}s")
                                     # Broadcast to peers
                                     node.broadcast_block(block)
+                            elif cmd[0] == 'miner' and len(cmd) > 1:
+                                if cmd[1] == 'start':
+                                    max_latency = float(cmd[2]) if len(cmd) > 2 else args.max_latency
+                                    node.start_miner(max_latency, args.miner_workers,
+                                                     miner_address=args.reward_to)
+                                elif cmd[1] == 'stop':
+                                    node.stop_miner()
+                                elif cmd[1] == 'status':
+                                    if node.miner:
+                                        status = node.miner.status()
+                                        state = "running" if status['running'] else "stopped"
+                                        print(f"⛏️  Miner {state} ({status['workers']} workers, max latency {status['max_latency']}s)")
+                                        print(f"   Blocks mined: {status['blocks_mined']} | Templates aborted: {status['templates_aborted']}")
+                                        if status['mining_block'] is not None:
+                                            print(f"   Mining block {status['mining_block']} with {status['template_transactions']} transactions")
+                                        print(f"   Pending transactions: {status['pending_transactions']}")
+                                        if status['last_error']:
+                                            print(f"   Last error: {status['last_error']}")
+                                    else:
+                                        print("⛏️  Miner not started")
+                                else:
+                                    print("Usage: miner start [max_latency] | miner stop | miner status")
                             elif cmd[0] == 'view':
                                 print(f"🔗 Blockchain length: {len(bc.chain)}")
                                 print(f"⏳ Pending transactions: {len(bc.pending_transactions)}")
+                            elif cmd[0] == 'connect' and len(cmd) == 3 and host:
+                                peer_host, peer_port = cmd[1], int(cmd[2])
+                                connected = host.connect_to_peer(peer_host, peer_port)
+                                if connected:
+                                    print(f"🔗 Connected to {peer_host}:{peer_port} for chains: {', '.join(connected)}")
+                                else:
+                                    print(f"❌ Failed to connect to {peer_host}:{peer_port}")
                             elif cmd[0] == 'connect' and len(cmd) == 3:
                                 peer_host, peer_port = cmd[1], int(cmd[2])
                                 if node.connect_to_peer(peer_host, peer_port):
@@ -187,14 +569,63 @@ def main():
                                 else:
                                     print(f"❌ Failed to connect to {peer_host}:{peer_port}")
                             elif cmd[0] == 'peers':
-                                print(f"Connected peers: {list(node.peers)}")
+                                print(f"Connected peers: {len(node.outbound)} out / {len(node.inbound)} in")
+                                for peer in node.peer_manager.rank(node.peers):
+                                    stats = node.peer_manager.stats(peer)
+                                    rtt = f"{stats['rtt_ms']:.1f}ms" if stats['rtt_ms'] is not None else "?"
+                                    print(f"  {peer[0]}:{peer[1]} score={node.peer_manager.score(peer):.2f} "
+                                          f"rtt={rtt} useful={stats['useful_blocks']} failures={stats['failures']}")
+                                banned = [p for p in node.peer_manager.book if node.peer_manager.is_banned(p)]
+                                if banned:
+                                    print(f"🚫 Banned: {banned}")
+                            elif cmd[0] == 'discover':
+                                print(f"🔎 Connected to {node.discover_peers()} new peers")
+                            elif cmd[0] == 'sync':
+                                if node.sync_chain():
+                                    bc.save_to_file(filename)
+                            elif cmd[0] == 'ingest':
+                                stats = node.ingest.stats()
+                                print(f"📥 Queues: check={stats['check_queue']} link={stats['link_queue']} orphans={stats['orphans']}")
+                                print(f"   Accepted: {stats['accepted']} | Rejected: {stats['rejected']} | "
+                                      f"Stale: {stats['stale']} | Busy: {stats['busy']}")
+                                for stage, latency in stats['latency'].items():
+                                    print(f"   {stage}: wait {latency['wait_ms']:.1f}ms, work {latency['work_ms']:.1f}ms")
+                            elif cmd[0] == 'api':
+                                if node.query_api:
+                                    stats = node.query_api.stats()
+                                    print(f"🔎 http://{node.query_api.host}:{node.query_api.port}/ | "
+                                          f"cached={stats['cached']} hits={stats['hits']} misses={stats['misses']}")
+                                else:
+                                    print("⚠️  Query API not started (use --api-port)")
+                            elif cmd[0] == 'chains' and host:
+                                for name, hosted in host.nodes.items():
+                                    marker = "*" if hosted is node else " "
+                                    print(f" {marker} {name}: length {len(hosted.blockchain.chain)}, "
+                                          f"difficulty {hosted.blockchain.difficulty}, "
+                                          f"pending {len(hosted.blockchain.pending_transactions)}")
+                            elif cmd[0] == 'use' and len(cmd) == 2 and host:
+                                if cmd[1] in host.nodes:
+                                    node = host.nodes[cmd[1]]
+                                    bc = node.blockchain
+                                    filename = chain_filename(cmd[1])
+                                else:
+                                    print(f"❌ Chain '{cmd[1]}' is not hosted here")
+                            elif cmd[0] == 'pool' and host:
+                                stats = host.pool.stats()
+                                print(f"🧮 Shared pool: {stats['workers']} workers, {stats['running']} running")
+                                for name in host.nodes:
+                                    print(f"   {name}: queued {stats['queued'].get(name, 0)}, "
+                                          f"completed {stats['completed'].get(name, 0)}")
                             else:
                                 print("Unknown command or wrong arguments")
                                 
                     except KeyboardInterrupt:
                         pass
                     finally:
-                        node.stop()
+                        if host:
+                            host.stop()
+                        else:
+                            node.stop()
                         clear_node_state()
                         print("\n🛑 Node stopped")
             
@@ -227,4 +658,8 @@ def main():
         parser.print_help()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    try:
+        main()
+    except ChainFileError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,189 @@
+import os
+import struct
+import threading
+from block import header_hash
+
+HEADER_RECORD = struct.Struct("<QdQ32s32s32s")  # index, timestamp, nonce, previous_hash, tx_root, hash
+HEADERS_MAGIC = b"MBH2"
+GENESIS_PREVIOUS = bytes(32)  # Stands in for the genesis previous_hash "0"
+
+def header_from_block(block):
+    """Header fields of a Block"""
+    return {
+        'index': block.index,
+        'timestamp': block.timestamp,
+        'previous_hash': block.previous_hash,
+        'nonce': block.nonce,
+        'tx_root': block.tx_root,
+        'hash': block.hash
+    }
+
+class HeaderChain:
+    def __init__(self, difficulty=2):
+        """
+        Headers-only chain for light nodes
+
+        Headers are packed into one bytearray at HEADER_RECORD.size (120)
+        bytes each, so memory grows by a fixed amount per block and no
+        transaction data is ever held. The transaction root in each header
+        lets its hash be recomputed without the body.
+
+        :param difficulty: Leading zeros every non-genesis hash must have
+        """
+        self.difficulty = difficulty
+        self._data = bytearray()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data) // HEADER_RECORD.size
+
+    @staticmethod
+    def _pack(header):
+        previous = header['previous_hash']
+        return HEADER_RECORD.pack(
+            header['index'],
+            header['timestamp'],
+            header['nonce'],
+            GENESIS_PREVIOUS if previous == "0" else bytes.fromhex(previous),
+            bytes.fromhex(header['tx_root']),
+            bytes.fromhex(header['hash'])
+        )
+
+    @staticmethod
+    def _unpack(record, offset=0):
+        index, timestamp, nonce, previous, tx_root, block_hash = HEADER_RECORD.unpack_from(record, offset)
+        return {
+            'index': index,
+            'timestamp': timestamp,
+            'previous_hash': "0" if index == 0 else previous.hex(),
+            'nonce': nonce,
+            'tx_root': tx_root.hex(),
+            'hash': block_hash.hex()
+        }
+
+    def _get(self, index):
+        """Header at a height; caller holds the lock"""
+        return self._unpack(self._data, index * HEADER_RECORD.size)
+
+    def get(self, index):
+        """Header dictionary at a height, or None if out of range"""
+        with self._lock:
+            if not 0 <= index < len(self):
+                return None
+            return self._get(index)
+
+    @property
+    def last_header(self):
+        with self._lock:
+            return self._get(len(self) - 1) if len(self) else None
+
+    def iter_headers(self, start=0, stop=None):
+        """Yield headers start..stop-1, one at a time"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(max(start, 0), stop):
+            yield self.get(index)
+
+    def _is_valid_header(self, previous, header):
+        """Check hash, linkage and proof-of-work of one header against its parent"""
+        try:
+            self._pack(header)
+        except (KeyError, TypeError, ValueError, AttributeError, struct.error):
+            print("❌ Malformed header")
+            return False
+        if header_hash(header) != header['hash']:
+            print(f"❌ Header {header['index']}: Hash does not match its fields")
+            return False
+        if previous is None:
+            if header['index'] != 0 or header['previous_hash'] != "0":
+                print("❗ Invalid genesis header")
+                return False
+            return True
+        i = previous['index'] + 1
+        if header['previous_hash'] != previous['hash']:
+            print(f"❌ Header {i}: Broken link to previous block")
+            return False
+        if header['index'] != i:
+            print(f"❌ Header {i}: Invalid index {header['index']}")
+            return False
+        if not header['hash'].startswith("0" * self.difficulty):
+            print(f"❌ Header {i}: Insufficient proof-of-work")
+            return False
+        return True
+
+    def add_headers(self, headers):
+        """
+        Add a contiguous run of headers received from a peer. The run may
+        start below our tip; if it forks off our chain and ends up longer,
+        our headers past the fork point are replaced (longest chain rule).
+        Returns the number of headers added, or None if the run is invalid
+        or does not connect to our chain.
+        """
+        if not headers:
+            return 0
+        with self._lock:
+            start = headers[0]['index']
+            if not 0 <= start <= len(self):
+                return None
+            previous = self._get(start - 1) if start else None
+            for header in headers:
+                if not self._is_valid_header(previous, header):
+                    return None
+                previous = header
+
+            # Skip headers we already hold
+            fork = start
+            while fork - start < len(headers) and fork < len(self) \
+                    and self._get(fork)['hash'] == headers[fork - start]['hash']:
+                fork += 1
+            new = headers[fork - start:]
+            if not new:
+                return 0
+            if start + len(headers) <= len(self):
+                return 0  # A fork that is not longer than our chain
+
+            if fork < len(self):
+                print(f"🔀 Header reorg at height {fork}")
+                del self._data[fork * HEADER_RECORD.size:]
+            self._data += b"".join(self._pack(header) for header in new)
+            return len(new)
+
+    def is_valid(self):
+        """Verify hash, linkage and proof-of-work of every stored header"""
+        previous = None
+        for header in self.iter_headers():
+            if not self._is_valid_header(previous, header):
+                return False
+            previous = header
+        return True
+
+    def memory_usage(self):
+        """Bytes used by header storage"""
+        return len(self._data)
+
+    def save_to_file(self, filename="headers.dat"):
+        """Write magic, difficulty and packed headers atomically"""
+        with self._lock:
+            data = bytes(self._data)
+        with open(filename + ".tmp", 'wb') as f:
+            f.write(HEADERS_MAGIC + struct.pack("<B", self.difficulty) + data)
+        os.replace(filename + ".tmp", filename)
+
+    @classmethod
+    def load_from_file(cls, filename="headers.dat"):
+        """Load headers, or start an empty chain if the file does not exist"""
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            print("ℹ️  No header file found, starting with no headers")
+            return cls()
+        if data[:len(HEADERS_MAGIC)] == b"MBH1":
+            # Headers without a transaction root cannot be verified; resync
+            print("ℹ️  Header file uses an older format, starting with no headers")
+            return cls(difficulty=data[len(HEADERS_MAGIC)])
+        if data[:len(HEADERS_MAGIC)] != HEADERS_MAGIC:
+            raise ValueError(f"{filename} is not a header file")
+        headers = cls(difficulty=data[len(HEADERS_MAGIC)])
+        body = data[len(HEADERS_MAGIC) + 1:]
+        headers._data = bytearray(body[:len(body) - len(body) % HEADER_RECORD.size])
+        return headers
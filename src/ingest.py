@@ -0,0 +1,223 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from block import Block
+
+ORPHAN_LIMIT = 256  # Blocks held while waiting for their parent
+LATENCY_SMOOTHING = 0.2  # Weight of the newest sample in latency averages
+TIP_CHANGED = "tip changed"  # Link-queue marker: the tip moved outside the pipeline
+
+def check_block_proof(block_data, difficulty):
+    """
+    Worker-process entry point for the stateless stage-one check. Peers
+    must send full bodies; a block without a transaction list is invalid.
+    """
+    if not isinstance(block_data.get('transactions'), list):
+        return False
+    return Block.from_dict(block_data).has_valid_proof(difficulty)
+
+class BlockIngestPipeline:
+    def __init__(self, blockchain, workers=4, queue_size=64, on_block=None, on_invalid=None,
+                 pool=None, chain_id=None):
+        """
+        Staged processing of blocks received from peers
+
+        Stage one (worker pool) decodes blocks and checks hash and
+        proof-of-work without touching the chain. Stage two (a single
+        linker thread) appends them in order. Both queues are bounded, so
+        a burst of blocks makes submit() block instead of piling up threads.
+        Blocks that arrive before their parent are parked as orphans and
+        linked once the parent becomes the tip, whether it came through
+        the pipeline, a local miner or a chain sync.
+
+        :param blockchain: Blockchain instance to extend
+        :param workers: Number of stage-one threads
+        :param queue_size: Capacity of each stage queue
+        :param on_block: Callback(block, source) run after a block is linked
+        :param on_invalid: Callback(source) run when a peer sends an invalid block
+        :param pool: Optional SharedWorkerPool that runs the proof-of-work checks
+        :param chain_id: Chain name the shared pool schedules checks under
+        """
+        self.blockchain = blockchain
+        self.workers = workers
+        self.on_block = on_block
+        self.on_invalid = on_invalid
+        self.pool = pool
+        self.chain_id = chain_id
+        self._check_queue = queue.Queue(maxsize=queue_size)
+        self._link_queue = queue.Queue(maxsize=queue_size)
+        self._orphans = OrderedDict()  # parent hash -> (block, source)
+        self._threads = []
+        self.running = False
+        self.stats_lock = threading.Lock()
+        self.counters = {'accepted': 0, 'rejected': 0, 'orphaned': 0, 'stale': 0, 'busy': 0}
+        self.latency = {
+            'check': {'wait_ms': 0.0, 'work_ms': 0.0},
+            'link': {'wait_ms': 0.0, 'work_ms': 0.0}
+        }
+
+    def start(self):
+        """Start the stage-one workers and the linker thread"""
+        self.running = True
+        for _ in range(self.workers):
+            self._spawn(self._check_worker)
+        self._spawn(self._link_worker)
+        self.blockchain.add_tip_listener(self._on_tip)
+
+    def stop(self):
+        """Stop all stages; queued blocks are dropped"""
+        self.running = False
+        self.blockchain.remove_tip_listener(self._on_tip)
+        # Wake idle threads; busy ones see running=False after their item
+        for q, count in ((self._check_queue, self.workers), (self._link_queue, 1)):
+            for _ in range(count):
+                try:
+                    q.put_nowait(None)
+                except queue.Full:
+                    break
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def submit(self, block_data, source=None, timeout=5.0):
+        """
+        Queue a serialized block from a peer. Blocks the caller while the
+        pipeline is full, applying backpressure to the sending peer.
+        Returns False if the block could not be queued within timeout.
+        """
+        try:
+            self._check_queue.put((block_data, source, time.time()), timeout=timeout)
+            return True
+        except queue.Full:
+            self._count('busy')
+            return False
+
+    def stats(self):
+        """Queue depths, counters and per-stage latency averages"""
+        with self.stats_lock:
+            return {
+                'check_queue': self._check_queue.qsize(),
+                'link_queue': self._link_queue.qsize(),
+                'orphans': len(self._orphans),
+                **self.counters,
+                'latency': {stage: dict(values) for stage, values in self.latency.items()}
+            }
+
+    def _spawn(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _count(self, name):
+        with self.stats_lock:
+            self.counters[name] += 1
+
+    def _reject(self, source):
+        """Count an invalid block and report the peer that sent it"""
+        self._count('rejected')
+        if self.on_invalid and source:
+            self.on_invalid(source)
+
+    def _record(self, stage, queued_at, started_at):
+        """Fold one sample into the stage's moving averages"""
+        now = time.time()
+        with self.stats_lock:
+            values = self.latency[stage]
+            for key, sample in (('wait_ms', started_at - queued_at), ('work_ms', now - started_at)):
+                values[key] += LATENCY_SMOOTHING * (sample * 1000 - values[key])
+
+    def _check_worker(self):
+        """Stage one: decode and verify proof-of-work statelessly"""
+        while self.running:
+            item = self._check_queue.get()
+            if item is None:
+                break
+            block_data, source, queued_at = item
+            started_at = time.time()
+            try:
+                block = Block.from_dict(block_data)
+                if self.pool:
+                    valid = self.pool.submit(self.chain_id, check_block_proof, block_data,
+                                             self.blockchain.difficulty, urgent=True).result()
+                else:
+                    valid = check_block_proof(block_data, self.blockchain.difficulty)
+            except RuntimeError:
+                continue  # Shared pool shut down; the node is stopping
+            except (KeyError, TypeError, ValueError, AttributeError):
+                valid = False
+            self._record('check', queued_at, started_at)
+
+            if not valid:
+                print(f"❌ Rejected block from {source}: bad hash or proof-of-work")
+                self._reject(source)
+                continue
+            # Blocks here when the linker falls behind, backing up stage one
+            self._link_queue.put((block, source, time.time()))
+
+    def _link_worker(self):
+        """Stage two: append blocks in chain order, parking early arrivals"""
+        while self.running:
+            item = self._link_queue.get()
+            if item is None:
+                break
+            # Whatever a peer sent, the linker thread must survive it
+            try:
+                if item is not TIP_CHANGED:
+                    block, source, queued_at = item
+                    started_at = time.time()
+                    self._link(block, source)
+                    self._record('link', queued_at, started_at)
+                self._drain_orphans()
+            except Exception as e:
+                print(f"❗ Failed to link a block: {e!r}")
+                self._count('rejected')
+
+    def _on_tip(self, block):
+        """Tip listener: wake the linker when a parked block's parent arrives"""
+        if block.hash in self._orphans:
+            try:
+                self._link_queue.put_nowait(TIP_CHANGED)
+            except queue.Full:
+                pass  # The linker drains orphans after every queued block anyway
+
+    def _link(self, block, source):
+        tip = self.blockchain.last_block
+        if block.index <= tip.index:
+            self._count('stale')
+            return
+        if block.previous_hash != tip.hash:
+            if block.index > tip.index + 1:
+                # Parent still in flight; keep it until the parent links
+                self._orphans[block.previous_hash] = (block, source)
+                if len(self._orphans) > ORPHAN_LIMIT:
+                    self._orphans.popitem(last=False)
+                self._count('orphaned')
+            else:
+                self._count('rejected')
+            return
+
+        self._try_link(block, source)
+
+    def _drain_orphans(self):
+        """Link parked blocks that now extend the tip; runs on the linker thread"""
+        while self._orphans:
+            block, source = self._orphans.pop(self.blockchain.last_block.hash, (None, None))
+            if block is None or not self._try_link(block, source):
+                return
+
+    def _try_link(self, block, source):
+        """
+        Append one block. Only a block that is invalid reports its peer; one
+        that lost a race with another block for the tip is merely stale.
+        """
+        linked = self.blockchain.link_block(block, hash_checked=True)
+        if linked is None:
+            self._count('stale')
+        elif not linked:
+            self._reject(source)
+        else:
+            self._count('accepted')
+            if self.on_block:
+                self.on_block(block, source)
+        return linked
@@ -0,0 +1,237 @@
+import socket
+import threading
+import time
+from block import Block, HEADER_FIELDS
+from headers import header_from_block
+from peers import PeerManager
+from p2p_network import send_message, recv_message, identify_peer, MAX_HEADERS_PER_REPLY
+from chains import DEFAULT_CHAIN
+
+class LightNode:
+    def __init__(self, host, port, headers, headers_file="headers.dat", max_outbound=8, peers_file=None,
+                 chain_id=DEFAULT_CHAIN):
+        """
+        Headers-only node for low-memory deployments
+
+        Syncs and stores block headers, checking linkage and proof-of-work,
+        and fetches full blocks from full peers only when asked for one.
+        Serves headers to other nodes but never full blocks or transactions.
+
+        :param host: IP address to bind to
+        :param port: Port to listen on
+        :param headers: HeaderChain instance
+        :param headers_file: File the headers are saved to
+        :param max_outbound: Peers this node connects out to
+        :param peers_file: Address book file (default: peers_<port>.json)
+        :param chain_id: Name of the chain followed; every message is tagged with it
+        """
+        self.host = host
+        self.port = port
+        self.headers = headers
+        self.headers_file = headers_file
+        self.chain_id = chain_id
+        self.peers = set()  # Stores (host, port) of connected peers
+        self.peer_manager = PeerManager(peers_file or f"peers_{port}.json", max_outbound)
+        self.server_socket = None
+        self.running = False
+        self._sync_lock = threading.Lock()
+
+    def capabilities(self):
+        """Advertised on connect: a light node serves no block bodies"""
+        return {'pruned_height': len(self.headers) - 1, 'archive': False, 'light': True}
+
+    def start(self):
+        """Start listening for block announcements and header requests"""
+        self.running = True
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.bind((self.host, self.port))
+        self.server_socket.listen(5)
+        print(f"🪶 Light node started at {self.host}:{self.port}")
+        threading.Thread(target=self.accept_connections, daemon=True).start()
+
+    def accept_connections(self):
+        while self.running:
+            try:
+                client_socket, _ = self.server_socket.accept()
+                threading.Thread(target=self.handle_connection, args=(client_socket,), daemon=True).start()
+            except OSError:
+                if self.running:
+                    print("⚠️  Error accepting connection")
+
+    def handle_connection(self, client_socket):
+        """Read and dispatch one message from a connection"""
+        with client_socket:
+            try:
+                message = recv_message(client_socket)
+                if not message:
+                    return
+                if message.get('chain', DEFAULT_CHAIN) != self.chain_id:
+                    send_message(client_socket, {'type': 'reject', 'reason': 'unknown chain'})
+                    return
+                sender = identify_peer(message, client_socket, self.peers)
+                if self.peer_manager.is_banned(sender):
+                    return
+
+                if message['type'] == 'connect':
+                    peer = sender
+                    self.peers.add(peer)
+                    self.peer_manager.add_addresses([peer])
+                    send_message(client_socket, {
+                        'type': 'acknowledge',
+                        'message': f"Connected to light node {self.host}:{self.port}",
+                        **self.capabilities()
+                    })
+
+                elif message['type'] == 'compact_block':
+                    self.on_header(message['header'], sender)
+
+                elif message['type'] == 'new_block':
+                    self.on_header(header_from_block(Block.from_dict(message['data'])), sender)
+
+                elif message['type'] == 'get_headers':
+                    start = max(message.get('from', 0), 0)
+                    limit = min(message.get('limit', MAX_HEADERS_PER_REPLY), MAX_HEADERS_PER_REPLY)
+                    send_message(client_socket, {
+                        'type': 'headers',
+                        'headers': list(self.headers.iter_headers(start, start + limit))
+                    })
+
+                elif message['type'] == 'get_chain':
+                    send_message(client_socket, {'type': 'pruned', **self.capabilities()})
+
+                elif message['type'] == 'get_peers':
+                    send_message(client_socket, {
+                        'type': 'peers',
+                        'peers': self.peer_manager.addresses(exclude=sender)
+                    })
+                # Transactions and block bodies are not kept by light nodes
+
+            except Exception as e:
+                print(f"⚠️  Connection error: {e}")
+
+    def on_header(self, data, sender):
+        """Extend the header chain from an announced block, syncing on gaps"""
+        header = {key: data[key] for key in HEADER_FIELDS + ('hash',)}
+        added = self.headers.add_headers([header])
+        if added:
+            print(f"🪶 Header {header['index']} accepted")
+            self.peer_manager.record_useful_block(sender)
+        elif added is None and header['index'] >= len(self.headers) and sender[1] is not None:
+            # Parent unknown (missed announcements or a fork): catch up from
+            # the sender, if it completed a handshake telling us its port
+            self.sync_headers([sender])
+
+    def connect_to_peer(self, peer_host, peer_port):
+        """Connect to another node"""
+        peer = (peer_host, peer_port)
+        if self.peer_manager.is_banned(peer):
+            print(f"🚫 {peer_host}:{peer_port} is banned")
+            return False
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.settimeout(10)
+                started_at = time.time()
+                s.connect(peer)
+                send_message(s, {
+                    'type': 'connect',
+                    'chain': self.chain_id,
+                    'host': self.host,
+                    'port': self.port,
+                    **self.capabilities()
+                })
+                response = recv_message(s)
+                if response and response['type'] == 'acknowledge':
+                    self.peer_manager.record_success(peer, time.time() - started_at)
+                    self.peers.add(peer)
+                    print(f"🔗 Connected to peer {peer_host}:{peer_port}")
+                    return True
+        except Exception as e:
+            print(f"⚠️  Failed to connect to {peer_host}:{peer_port}: {e}")
+        self.peer_manager.record_failure(peer)
+        return False
+
+    def send_to_peer(self, peer, message):
+        """Send one request and wait for the reply; None on failure"""
+        message = dict(message, sender=[self.host, self.port], chain=self.chain_id)
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.settimeout(10)
+                started_at = time.time()
+                s.connect(peer)
+                self.peer_manager.record_success(peer, time.time() - started_at)
+                send_message(s, message)
+                return recv_message(s)
+        except Exception:
+            print(f"⚠️  Failed to send to {peer[0]}:{peer[1]}")
+            self.peer_manager.record_failure(peer)
+            return None
+
+    def _fetch_headers(self, peer, start):
+        reply = self.send_to_peer(peer, {'type': 'get_headers', 'from': start, 'limit': MAX_HEADERS_PER_REPLY})
+        if not reply or reply.get('type') != 'headers':
+            return None
+        return reply['headers']
+
+    def sync_headers(self, peers=None):
+        """
+        Download headers past our tip from each peer, best first. If a
+        peer's headers do not attach to our tip, step back until they do
+        so a longer fork can replace ours.
+        Returns the number of headers added.
+        """
+        added = 0
+        with self._sync_lock:
+            for peer in self.peer_manager.rank(peers if peers is not None else self.peers):
+                start = len(self.headers)
+                step = 1
+                while True:
+                    batch = self._fetch_headers(peer, start)
+                    if not batch:
+                        break
+                    count = self.headers.add_headers(batch)
+                    if count is None:
+                        if start == 0:
+                            print(f"🚫 {peer[0]}:{peer[1]} sent invalid headers")
+                            self.peer_manager.record_invalid_block(peer)
+                            self.peers.discard(peer)
+                            break
+                        # Does not attach: look for the fork point further back
+                        start = max(start - step, 0)
+                        step *= 2
+                        continue
+                    added += count
+                    if len(batch) < MAX_HEADERS_PER_REPLY:
+                        break
+                    start = batch[-1]['index'] + 1
+        if added:
+            print(f"🔄 Synced {added} headers (height {len(self.headers) - 1})")
+        return added
+
+    def fetch_block(self, index):
+        """
+        Fetch one full block from a full peer and check it against our header
+        Returns the Block, or None if no peer could serve a matching block.
+        """
+        header = self.headers.get(index)
+        if header is None:
+            print(f"⚠️  No header at height {index}; sync first")
+            return None
+        for peer in self.peer_manager.rank(self.peers):
+            reply = self.send_to_peer(peer, {'type': 'get_block', 'index': index})
+            if not reply or not reply.get('data'):
+                continue
+            block = Block.from_dict(reply['data'])
+            # The full block is authenticated by recomputing the header hash
+            if block.hash == header['hash'] and block.calculate_hash() == header['hash']:
+                return block
+            print(f"❗ Block {index} from {peer[0]}:{peer[1]} does not match its header")
+        return None
+
+    def stop(self):
+        """Stop the node and persist headers and the address book"""
+        self.running = False
+        if self.server_socket:
+            self.server_socket.close()
+        self.headers.save_to_file(self.headers_file)
+        self.peer_manager.save()
+        print("🛑 Node stopped")
@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from block import header_hash
+
+def search_nonce_range(header, difficulty, start_nonce, count):
+    """
+    Worker-process entry point: try nonces [start_nonce, start_nonce + count)
+
+    :param header: Block header dictionary (index, timestamp, previous_hash, tx_root)
+    :param difficulty: Number of leading zeros required
+    Returns (nonce, hash) on success, None if the range is exhausted.
+    """
+    header = dict(header)
+    prefix = "0" * difficulty
+    for nonce in range(start_nonce, start_nonce + count):
+        header['nonce'] = nonce
+        block_hash = header_hash(header)
+        if block_hash.startswith(prefix):
+            return nonce, block_hash
+    return None
+
+class MiningService:
+    def __init__(self, blockchain, node=None, workers=None, max_latency=5.0,
+                 max_block_transactions=100, chunk_size=20000,
+                 save_file="blockchain.json", miner_address=None, pool=None, chain_id=None):
+        """
+        Background miner that keeps cutting blocks from the pending pool
+
+        :param blockchain: Blockchain instance to extend
+        :param node: Optional Node used to broadcast mined blocks
+        :param workers: Number of mining processes (default: CPU count)
+        :param max_latency: Seconds a transaction may wait before a block is cut
+        :param max_block_transactions: Cut a block as soon as this many are pending
+        :param chunk_size: Nonces handed to a worker per task
+        :param save_file: File the chain is persisted to after each block
+        :param miner_address: Optional account credited with the block reward
+        :param pool: Optional SharedWorkerPool to mine on instead of own processes
+        :param chain_id: Chain name the shared pool schedules this miner under
+        """
+        self.blockchain = blockchain
+        self.node = node
+        self.shared_pool = pool
+        self.chain_id = chain_id
+        self.workers = (pool.workers if pool else workers) or os.cpu_count() or 1
+        self.max_latency = max_latency
+        self.max_block_transactions = max_block_transactions
+        self.chunk_size = chunk_size
+        self.save_file = save_file
+        self.miner_address = miner_address
+        self.running = False
+        self.blocks_mined = 0
+        self.templates_aborted = 0
+        self.hashes_tried = 0
+        self.current_template = None
+        self.last_block_time = None
+        self.last_error = None
+        self._thread = None
+        self._pool = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start the mining loop and its worker processes"""
+        if self.running:
+            return
+        if self._thread is not None:
+            self.stop()  # Clean up after a loop that died on an error
+        self.running = True
+        self._stop_event.clear()
+        if self.shared_pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"⛏️  Miner started ({self.workers} workers, max latency {self.max_latency}s)")
+
+    def stop(self):
+        """Stop mining; an in-progress template is abandoned"""
+        if self._thread is None:
+            return
+        self.running = False
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        print("🛑 Miner stopped")
+
+    def status(self):
+        """Return a dictionary describing the miner state"""
+        pending, waited = self.blockchain.pending_status()
+        template = self.current_template
+        return {
+            'running': self.running,
+            'workers': self.workers,
+            'max_latency': self.max_latency,
+            'blocks_mined': self.blocks_mined,
+            'templates_aborted': self.templates_aborted,
+            'hashes_tried': self.hashes_tried,
+            'mining_block': template.index if template else None,
+            'template_transactions': len(template.transactions) if template else 0,
+            'pending_transactions': pending,
+            'oldest_pending_age': waited,
+            'last_block_time': self.last_block_time,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        """
+        Mining loop. An unexpected error stops the miner and is reported
+        instead of leaving a dead thread that still looks running.
+        """
+        try:
+            self._mine_until_stopped()
+        except Exception as e:
+            print(f"❗ Miner stopped after an error: {e!r}")
+            self.running = False
+            self.last_error = repr(e)
+
+    def _mine_until_stopped(self):
+        """Wait for a block to be due, mine it, publish it"""
+        while not self._stop_event.is_set():
+            pending, waited = self.blockchain.pending_status()
+            if not pending or (pending < self.max_block_transactions
+                               and waited < self.max_latency):
+                # Nothing due yet; keep accumulating transactions
+                delay = 0.25 if not pending else min(0.25, self.max_latency - waited)
+                self._stop_event.wait(delay)
+                continue
+
+            # Subscribe before building so a tip change can't slip past us
+            cancel_event = threading.Event()
+            listener = lambda block: cancel_event.set()
+            self.blockchain.add_tip_listener(listener)
+            try:
+                template = self.blockchain.create_block_template(
+                    self.max_block_transactions, self.miner_address)
+                if template is None:
+                    continue
+                self.current_template = template
+                found = self._search(template, self.blockchain.difficulty, cancel_event)
+            finally:
+                self.blockchain.remove_tip_listener(listener)
+                self.current_template = None
+
+            if found is None:
+                if not self._stop_event.is_set():
+                    self.templates_aborted += 1
+                    print(f"🔄 Chain tip changed, rebuilding template for block {self.blockchain.last_block.index + 1}")
+                continue
+
+            template.nonce, template.hash = found
+            if not self.blockchain.add_mined_block(template):
+                self.templates_aborted += 1
+                continue
+            self._publish(template)
+
+    def _search(self, template, difficulty, cancel_event):
+        """
+        Spread the nonce space over the worker pool in chunks.
+        Returns (nonce, hash), or None if cancelled or stopped.
+        """
+        # Workers get the header only; the body is committed through tx_root
+        header = template.header()
+        next_nonce = 0
+        in_flight = set()
+        try:
+            while True:
+                while len(in_flight) < self.workers:
+                    in_flight.add(self._submit(
+                        search_nonce_range, header, difficulty, next_nonce, self.chunk_size))
+                    next_nonce += self.chunk_size
+
+                done, in_flight = wait(in_flight, timeout=0.1, return_when=FIRST_COMPLETED)
+                if cancel_event.is_set() or self._stop_event.is_set():
+                    return None
+                for future in done:
+                    self.hashes_tried += self.chunk_size
+                    result = future.result()
+                    if result is not None:
+                        return result
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _submit(self, fn, *args):
+        if self.shared_pool:
+            return self.shared_pool.submit(self.chain_id, fn, *args)
+        return self._pool.submit(fn, *args)
+
+    def _publish(self, block):
+        """Persist and broadcast a freshly mined block"""
+        self.blocks_mined += 1
+        self.last_block_time = time.time()
+        print(f"✅ Miner produced block {block.index} with {len(block.transactions)} transactions")
+        print(f"   Hash: {block.hash}")
+        if self.save_file:
+            try:
+                self.blockchain.save_to_file(self.save_file)
+            except OSError as e:
+                # The block is on the chain already; the next save retries
+                print(f"⚠️  Could not save block {block.index}: {e}")
+                self.last_error = repr(e)
+        if self.node:
+            self.node.broadcast_block(block)
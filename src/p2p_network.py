@@ -1,150 +1,785 @@
 import socket
 import threading
 import json
+from collections import OrderedDict
 from blockchain import Blockchain
+from block import Block
+from miner import MiningService
+from ingest import BlockIngestPipeline
+from peers import PeerManager
+from query_api import QueryAPI
+from headers import header_from_block
+from chains import DEFAULT_CHAIN, chain_filename
+from worker_pool import SharedWorkerPool
+from transaction import Transaction, transaction_id
 import time
 
+SHORT_ID_LENGTH = 12  # Hex characters of the txid used in compact blocks
+RELAY_INTERVAL = 0.5  # Seconds between transaction relay batches
+RELAY_BATCH_SIZE = 100  # Flush the relay queue early once this many are queued
+SEEN_CACHE_SIZE = 10000  # Transaction ids remembered for gossip dedup
+MAX_CONNECTION_THREADS = 32  # Concurrent inbound connection handlers
+MAX_HEADERS_PER_REPLY = 2000  # Headers served for one get_headers request
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024  # Longest message read before the connection is dropped
+INBOUND_IDLE_SECONDS = 600  # Silent inbound peers give up their slot to new ones
+
+def send_message(sock, message):
+    """Send one newline-delimited JSON message"""
+    sock.sendall(json.dumps(message).encode('utf-8') + b"\n")
+
+def recv_message(sock, max_size=MAX_MESSAGE_SIZE):
+    """
+    Read one newline-delimited JSON message
+    Returns None if the peer closed the connection without sending anything.
+    Raises ValueError if the message grows past max_size bytes.
+    """
+    buffer = bytearray()
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        end = chunk.find(b"\n")
+        buffer += chunk if end == -1 else chunk[:end]
+        if len(buffer) > max_size:
+            raise ValueError(f"message exceeds {max_size} bytes")
+        if end != -1:
+            break
+    if not buffer:
+        return None
+    return json.loads(buffer.decode('utf-8'))
+
+def short_id(transaction):
+    """Short transaction id used to announce compact blocks"""
+    return transaction_id(transaction)[:SHORT_ID_LENGTH]
+
+def identify_peer(message, client_socket, peers):
+    """
+    Peer a message is attributed to for scoring and bans. The host is
+    the connection's real address, so a forged sender field cannot
+    implicate another host. The port comes from the connect handshake;
+    later messages keep their claimed port only if that address is in
+    peers (has completed one), and are otherwise attributed to (host, None).
+    """
+    host = client_socket.getpeername()[0]
+    if message['type'] == 'connect':
+        return (host, message['port'])
+    claimed = message.get('sender') or [None, None]
+    if (host, claimed[1]) in peers:
+        return (host, claimed[1])
+    return (host, None)
+
 class Node:
-    def __init__(self, host, port, blockchain):
+    def __init__(self, host, port, blockchain, max_outbound=8, max_inbound=16, peers_file=None,
+                 chain_id=DEFAULT_CHAIN, pool=None, peer_manager=None):
         """
         Initialize a blockchain node
         
         :param host: IP address to bind to
         :param port: Port to listen on
         :param blockchain: Blockchain instance
+        :param max_outbound: Peers this node connects out to
+        :param max_inbound: Peers allowed to connect to this node
+        :param peers_file: Address book file (default: peers_<port>.json)
+        :param chain_id: Name of the chain; every message is tagged with it
+        :param pool: Optional SharedWorkerPool for mining and block checks
+        :param peer_manager: Address book shared with other chains on this host
         """
         self.host = host
         self.port = port
         self.blockchain = blockchain
+        self.chain_id = chain_id
+        self.pool = pool
         self.peers = set()  # Stores (host, port) of connected peers
+        self.outbound = set()  # Peers we connected to
+        self.inbound = set()  # Peers that connected to us
+        self.last_heard = {}  # peer -> time of its latest message
+        self.peer_manager = peer_manager or PeerManager(
+            peers_file or f"peers_{port}.json", max_outbound, max_inbound)
         self.server_socket = None
         self.running = False
-        
-    def start(self):
-        """Start the node server"""
+        self.miner = None  # Background MiningService, if started
+        self.query_api = None  # Read-only HTTP query endpoint, if started
+        self.seen_transactions = OrderedDict()  # Bounded txid cache for gossip dedup
+        self._relay_queue = []  # (transaction, origin peer) waiting to be relayed
+        self._announce_queue = []  # (block, origin peer) linked but not yet announced
+        self._relay_lock = threading.Lock()
+        self._relay_wakeup = threading.Event()
+        self.ingest = BlockIngestPipeline(
+            blockchain,
+            on_block=self.on_block_linked,
+            on_invalid=self.on_invalid_block,
+            pool=pool,
+            chain_id=chain_id
+        )
+        self.peer_info = {}  # (host, port) -> storage capabilities the peer advertised
+        # Transactions confirmed in blocks are never gossiped again
+        blockchain.add_tip_listener(self.mark_block_seen)
+        self._connection_slots = threading.BoundedSemaphore(MAX_CONNECTION_THREADS)
+    
+    def start(self, listen=True):
+        """
+        Start the node server
+        :param listen: False when a ChainHost owns the socket and routes
+                       this chain's messages to dispatch()
+        """
         self.running = True
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(5)
-        print(f"🖥️  Node started at {self.host}:{self.port}")
+        if listen:
+            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket.bind((self.host, self.port))
+            self.server_socket.listen(5)
+            print(f"🖥️  Node started at {self.host}:{self.port}")
         
         # Start accepting connections
-        threading.Thread(target=self.accept_connections, daemon=True).start()
-        
+        self.ingest.start()
+        if listen:
+            threading.Thread(target=self.accept_connections, daemon=True).start()
+        threading.Thread(target=self.relay_transactions, daemon=True).start()
+    
     def accept_connections(self):
         """Accept incoming connections"""
         while self.running:
             try:
-                client_socket, addr = self.server_socket.accept()
+                # Stop accepting while all handlers are busy; further peers
+                # wait in the listen backlog instead of spawning threads
+                self._connection_slots.acquire()
+                try:
+                    client_socket, addr = self.server_socket.accept()
+                except:
+                    self._connection_slots.release()
+                    raise
                 print(f"🔌 Connection from {addr[0]}:{addr[1]}")
                 threading.Thread(
-                    target=self.handle_connection, 
+                    target=self.handle_connection,
                     args=(client_socket,),
                     daemon=True
                 ).start()
             except:
                 if self.running:
                     print("⚠️  Error accepting connection")
-                    
+    
     def handle_connection(self, client_socket):
         """Handle incoming messages"""
+        try:
+            self._handle_message(client_socket)
+        finally:
+            self._connection_slots.release()
+    
+    def _handle_message(self, client_socket):
+        """Read and dispatch one message from a connection"""
         with client_socket:
             try:
-                data = client_socket.recv(4096).decode('utf-8')
-                if not data:
-                    return
-                    
-                message = json.loads(data)
-                print(f"📨 Received: {message['type']}")
-                
+                message = recv_message(client_socket)
+            except Exception as e:
+                print(f"⚠️  Connection error: {e}")
+                return
+            if not message:
+                return
+            if message.get('chain', DEFAULT_CHAIN) != self.chain_id:
+                send_message(client_socket, {'type': 'reject', 'reason': 'unknown chain'})
+                return
+            self.dispatch(message, client_socket)
+    
+    def dispatch(self, message, client_socket):
+        """Handle one message addressed to this node's chain"""
+        try:
+            print(f"📨 Received: {message['type']}")
+            sender = self.identify(message, client_socket)
+            if self.peer_manager.is_banned(sender):
                 if message['type'] == 'connect':
-                    # Add new peer
-                    self.peers.add((message['host'], message['port']))
-                    client_socket.sendall(json.dumps({
+                    send_message(client_socket, {'type': 'reject', 'reason': 'banned'})
+                return
+            if sender in self.peers:
+                self.last_heard[sender] = time.time()
+            
+            if message['type'] == 'connect':
+                # Add new peer unless inbound slots are full
+                peer = sender
+                if peer not in self.peers and len(self.inbound) >= self.peer_manager.max_inbound:
+                    self.expire_inbound()
+                if peer not in self.peers and len(self.inbound) >= self.peer_manager.max_inbound:
+                    send_message(client_socket, {'type': 'reject', 'reason': 'full'})
+                else:
+                    self.peers.add(peer)
+                    self.inbound.add(peer)
+                    self.last_heard[peer] = time.time()
+                    self.peer_manager.add_addresses([peer])
+                    self.peer_info[peer] = self.capabilities_from(message)
+                    send_message(client_socket, {
                         'type': 'acknowledge',
-                        'message': f"Connected to {self.host}:{self.port}"
-                    }).encode('utf-8'))
-                    
-                elif message['type'] == 'get_chain':
-                    # Send blockchain data
-                    chain_data = self.blockchain.to_dict()
-                    client_socket.sendall(json.dumps({
+                        'message': f"Connected to {self.host}:{self.port}",
+                        **self.capabilities()
+                    })
+            
+            elif message['type'] == 'get_peers':
+                # Peer exchange: share the best addresses we know
+                send_message(client_socket, {
+                    'type': 'peers',
+                    'peers': self.peer_manager.addresses(exclude=sender)
+                })
+            
+            elif message['type'] == 'get_chain':
+                # Send blockchain data from the requested height
+                start = message.get('from', 0)
+                if not self.blockchain.can_serve_from(start):
+                    send_message(client_socket, {'type': 'pruned', **self.capabilities()})
+                else:
+                    send_message(client_socket, {
                         'type': 'chain',
-                        'data': chain_data
-                    }).encode('utf-8'))
-                    
-                elif message['type'] == 'new_block':
-                    # Handle new block from peer
-                    block_data = message['data']
-                    new_block = Block(
-                        index=block_data['index'],
-                        transactions=block_data['transactions'],
-                        timestamp=block_data['timestamp'],
-                        previous_hash=block_data['previous_hash']
-                    )
-                    new_block.hash = block_data['hash']
-                    new_block.nonce = block_data['nonce']
-                    
-                    # Add to chain if valid
-                    if self.blockchain.is_chain_valid() and self.blockchain.last_block.hash == new_block.previous_hash:
-                        self.blockchain.chain.append(new_block)
-                        print(f"🔗 Added block {new_block.index} from peer")
-                    
-            except Exception as e:
-                print(f"⚠️  Connection error: {e}")
-                
+                        'data': self.chain_data(start)
+                    })
+            
+            elif message['type'] == 'get_headers':
+                # Light nodes sync headers only
+                chain = self.blockchain.snapshot()
+                start = max(message.get('from', 0), 0)
+                limit = min(message.get('limit', MAX_HEADERS_PER_REPLY), MAX_HEADERS_PER_REPLY)
+                send_message(client_socket, {
+                    'type': 'headers',
+                    'headers': [header_from_block(block) for block in chain[start:start + limit]]
+                })
+            
+            elif message['type'] == 'get_block':
+                # One full block, fetched on demand by light nodes
+                block = self.blockchain.get_block(message['index'])
+                data = None
+                if block is not None and block.transactions is not None:
+                    data = dict(block.__dict__)
+                send_message(client_socket, {'type': 'block', 'data': data})
+            
+            elif message['type'] == 'new_block':
+                # Handle new block from peer via the ingestion pipeline;
+                # blocks here while the pipeline is full
+                if not self.ingest.submit(message['data'], sender):
+                    send_message(client_socket, {'type': 'busy'})
+            
+            elif message['type'] == 'new_transaction':
+                # Batch of gossiped transactions
+                for transaction in message['data']:
+                    self.submit_transaction(transaction, origin=sender)
+            
+            elif message['type'] == 'compact_block':
+                self.handle_compact_block(message, sender)
+            
+            elif message['type'] == 'get_block_transactions':
+                # Peer is rebuilding a compact block and misses some bodies
+                block = self.find_block(message['hash'])
+                transactions = None
+                if block:
+                    transactions = [block.transactions[i] for i in message['indexes']]
+                send_message(client_socket, {
+                    'type': 'block_transactions',
+                    'hash': message['hash'],
+                    'transactions': transactions
+                })
+        
+        except Exception as e:
+            print(f"⚠️  Connection error: {e}")
+
+    def identify(self, message, client_socket):
+        """Peer a message is attributed to for scoring and bans; see identify_peer"""
+        return identify_peer(message, client_socket, self.peers)
+    
+    def expire_inbound(self):
+        """Free the slots of inbound peers silent for INBOUND_IDLE_SECONDS"""
+        cutoff = time.time() - INBOUND_IDLE_SECONDS
+        for peer in list(self.inbound):
+            if self.last_heard.get(peer, 0) < cutoff:
+                print(f"⌛ Dropping idle peer {peer[0]}:{peer[1]}")
+                self.drop_peer(peer)
+    
     def connect_to_peer(self, peer_host, peer_port):
         """Connect to another node"""
+        peer = (peer_host, peer_port)
+        if self.peer_manager.is_banned(peer):
+            print(f"🚫 {peer_host}:{peer_port} is banned")
+            return False
+        if peer not in self.outbound and len(self.outbound) >= self.peer_manager.max_outbound:
+            print(f"⚠️  Outbound limit of {self.peer_manager.max_outbound} peers reached")
+            return False
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                started_at = time.time()
                 s.connect((peer_host, peer_port))
-                s.sendall(json.dumps({
+                send_message(s, {
                     'type': 'connect',
+                    'chain': self.chain_id,
                     'host': self.host,
-                    'port': self.port
-                }).encode('utf-8'))
+                    'port': self.port,
+                    **self.capabilities()
+                })
                 
-                response = json.loads(s.recv(4096).decode('utf-8'))
-                if response['type'] == 'acknowledge':
-                    self.peers.add((peer_host, peer_port))
+                response = recv_message(s)
+                if response and response['type'] == 'acknowledge':
+                    self.peer_manager.record_success(peer, time.time() - started_at)
+                    self.peers.add(peer)
+                    self.outbound.add(peer)
+                    self.peer_info[peer] = self.capabilities_from(response)
                     print(f"🔗 Connected to peer {peer_host}:{peer_port}")
                     return True
+                if response and response['type'] == 'reject':
+                    print(f"⚠️  {peer_host}:{peer_port} rejected connection ({response['reason']})")
         except Exception as e:
             print(f"⚠️  Failed to connect to {peer_host}:{peer_port}: {e}")
+        self.peer_manager.record_failure(peer)
         return False
+    
+    def discover_peers(self):
+        """
+        Peer exchange: ask connected peers for addresses, then fill free
+        outbound slots with the best-scoring addresses not yet connected
+        Returns the number of new connections.
+        """
+        for peer in self.peer_manager.rank(self.peers):
+            reply = self.send_to_peer(peer, {'type': 'get_peers'}, expect_reply=True)
+            if reply and reply.get('type') == 'peers':
+                self.peer_manager.add_addresses(
+                    tuple(address) for address in reply['peers']
+                    if tuple(address) != (self.host, self.port)
+                )
         
-    def broadcast_block(self, block):
-        """Broadcast a new block to all peers"""
-        block_data = {
-            'index': block.index,
-            'transactions': block.transactions,
-            'timestamp': block.timestamp,
-            'previous_hash': block.previous_hash,
-            'hash': block.hash,
-            'nonce': block.nonce
+        connected = 0
+        candidates = [p for p in self.peer_manager.dialable() if p not in self.peers and p != (self.host, self.port)]
+        for peer in self.peer_manager.rank(candidates):
+            if len(self.outbound) >= self.peer_manager.max_outbound:
+                break
+            if self.connect_to_peer(*peer):
+                connected += 1
+        self.peer_manager.save()
+        return connected
+    
+    def drop_peer(self, peer):
+        """Forget an active peer connection, freeing its slot"""
+        self.peers.discard(peer)
+        self.outbound.discard(peer)
+        self.inbound.discard(peer)
+        self.last_heard.pop(peer, None)
+    
+    def capabilities(self):
+        """Storage mode advertised to peers on connect"""
+        return {
+            'pruned_height': self.blockchain.pruned_height,
+            'archive': self.blockchain.archive,
+            'light': False
         }
+    
+    @staticmethod
+    def capabilities_from(message):
+        """Read advertised storage mode; older peers are treated as archival"""
+        return {
+            'pruned_height': message.get('pruned_height', -1),
+            'archive': message.get('archive', True),
+            'light': message.get('light', False)
+        }
+    
+    def chain_data(self, start=0):
+        """Serialize blocks from height start with full bodies"""
+        return {
+            'difficulty': self.blockchain.difficulty,
+            'from': start,
+            'chain': [dict(block.__dict__) for block in self.blockchain.iter_blocks(start)]
+        }
+    
+    def sync_peers(self, start):
+        """
+        Peers that can serve full blocks from height start, best first:
+        unpruned ranges, then peers serving them from compressed archives,
+        each group ordered by score (latency, reliability, useful blocks).
+        Peers that discarded the range and light nodes are skipped.
+        """
+        hot, archived = [], []
+        for peer in self.peer_manager.rank(self.peers):
+            info = self.peer_info.get(peer, {'pruned_height': -1, 'archive': True, 'light': False})
+            if info['light']:
+                continue
+            if start > info['pruned_height']:
+                hot.append(peer)
+            elif info['archive']:
+                archived.append(peer)
+        return hot + archived
+    
+    def request_chain(self, start=0):
+        """
+        Fetch blocks from height start, routed to peers that still hold them
+        Returns a list of block dictionaries, or None if no peer could serve.
+        """
+        for peer in self.sync_peers(start):
+            reply = self.send_to_peer(peer, {'type': 'get_chain', 'from': start}, expect_reply=True)
+            if not reply:
+                continue
+            if reply['type'] == 'pruned':
+                self.peer_info[peer] = self.capabilities_from(reply)
+                continue
+            if reply['type'] == 'chain' and reply['data']['chain']:
+                return reply['data']['chain']
+        return None
+    
+    def sync_chain(self):
+        """
+        Catch up with peers: fetch the blocks past our tip, or adopt a
+        longer chain if the peers forked below it
+        """
+        tip = self.blockchain.last_block
+        blocks = self.request_chain(tip.index + 1)
+        if not blocks:
+            print("✅ No peer has newer blocks")
+            return False
         
-        message = json.dumps({
-            'type': 'new_block',
-            'data': block_data
-        })
+        if blocks[0]['previous_hash'] == tip.hash:
+            added = 0
+            for block_data in blocks:
+                if not self.blockchain.add_block_from_peer(block_data):
+                    break
+                added += 1
+            print(f"🔄 Synced {added} blocks from peers")
+            return added > 0
         
-        for peer_host, peer_port in self.peers:
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.connect((peer_host, peer_port))
-                    s.sendall(message.encode('utf-8'))
-                    print(f"📤 Sent block {block.index} to {peer_host}:{peer_port}")
-            except:
-                print(f"⚠️  Failed to send to {peer_host}:{peer_port}")
-                
+        # Fork below our tip: fetch the full chain and apply the longest-chain rule
+        blocks = self.request_chain(0)
+        if blocks and self.blockchain.replace_chain([Block.from_dict(b) for b in blocks]):
+            print(f"🔄 Adopted peer chain of length {len(blocks)}")
+            return True
+        print("⚠️  Sync failed")
+        return False
+    
+    def send_to_peer(self, peer, message, expect_reply=False):
+        """
+        Send one message to a peer, optionally waiting for its reply
+        Returns the reply (or True) on success, None on failure.
+        """
+        message = dict(message, sender=[self.host, self.port], chain=self.chain_id)
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.settimeout(10)
+                started_at = time.time()
+                s.connect(peer)
+                connected_at = time.time()
+                send_message(s, message)
+                if expect_reply:
+                    reply = recv_message(s)
+                    # Request/response time includes the peer's work; the
+                    # connect handshake alone is a purer RTT sample
+                    self.peer_manager.record_success(peer, connected_at - started_at)
+                    return reply
+                self.peer_manager.record_success(peer, connected_at - started_at)
+                return True
+        except Exception:
+            print(f"⚠️  Failed to send to {peer[0]}:{peer[1]}")
+            self.peer_manager.record_failure(peer)
+            self.drop_peer(peer)  # Unreachable; discovery can reconnect later
+            return None
+    
+    def submit_transaction(self, transaction, origin=None):
+        """
+        Add a transaction to the local pool and queue it for gossip
+        :param transaction: Transaction, its dict form, or a free-form string
+        :param origin: Peer it came from (not relayed back there)
+        Returns the next block index, or None if it was a duplicate or rejected.
+        """
+        if isinstance(transaction, Transaction):
+            transaction = transaction.to_dict()
+        txid = transaction_id(transaction)
+        with self._relay_lock:
+            if txid in self.seen_transactions:
+                return None
+            self.seen_transactions[txid] = True
+            if len(self.seen_transactions) > SEEN_CACHE_SIZE:
+                self.seen_transactions.popitem(last=False)
+        
+        block_index = self.blockchain.add_transaction(transaction)
+        if block_index is not None:
+            with self._relay_lock:
+                self._relay_queue.append((transaction, origin))
+                if len(self._relay_queue) >= RELAY_BATCH_SIZE:
+                    self._relay_wakeup.set()
+        return block_index
+    
+    def mark_block_seen(self, block):
+        """Tip listener: remember the txids of every appended block"""
+        with self._relay_lock:
+            for transaction in block.transactions or []:
+                self.seen_transactions[transaction_id(transaction)] = True
+            while len(self.seen_transactions) > SEEN_CACHE_SIZE:
+                self.seen_transactions.popitem(last=False)
+    
+    def relay_transactions(self):
+        """
+        Background loop announcing linked peer blocks and sending queued
+        transactions to peers in batches
+        """
+        while self.running:
+            self._relay_wakeup.wait(RELAY_INTERVAL)
+            self._relay_wakeup.clear()
+            with self._relay_lock:
+                announcements, self._announce_queue = self._announce_queue, []
+                queued, self._relay_queue = self._relay_queue, []
+            for block, origin in announcements:
+                self.broadcast_block(block, exclude=origin)
+            if not queued:
+                continue
+            for peer in list(self.peers):
+                if self.peer_info.get(peer, {}).get('light'):
+                    continue  # Light nodes keep no pending pool
+                batch = [tx for tx, origin in queued if origin != peer]
+                if batch:
+                    self.send_to_peer(peer, {'type': 'new_transaction', 'data': batch})
+    
+    def find_block(self, block_hash):
+        """Look up a block in the local chain by hash, newest first"""
+        for block in reversed(self.blockchain.snapshot()):
+            if block.hash == block_hash:
+                return block
+        return None
+    
+    def handle_compact_block(self, message, sender):
+        """
+        Rebuild a block from its header and short ids using the pending pool,
+        fetching only the missing transactions from the announcing peer
+        """
+        header = message['header']
+        if self.find_block(header['hash']):
+            return
+        
+        # Index the pending pool by short id; ambiguous ids count as missing
+        pool = {}
+        for transaction in self.blockchain.get_pending():
+            sid = short_id(transaction)
+            pool[sid] = None if sid in pool else transaction
+        
+        prefilled = {int(i): tx for i, tx in message.get('prefilled', {}).items()}
+        transactions = []
+        missing = []
+        for i, sid in enumerate(message['short_ids']):
+            if i in prefilled:
+                transactions.append(prefilled[i])
+            elif pool.get(sid) is not None:
+                transactions.append(pool[sid])
+            else:
+                transactions.append(None)
+                missing.append(i)
+        
+        if missing:
+            print(f"🧩 Compact block {header['index']}: fetching {len(missing)}/{len(transactions)} transactions")
+            reply = None
+            if sender and sender[1] is not None:
+                reply = self.send_to_peer(sender, {
+                    'type': 'get_block_transactions',
+                    'hash': header['hash'],
+                    'indexes': missing
+                }, expect_reply=True)
+            if not reply or reply.get('transactions') is None:
+                print(f"⚠️  Could not rebuild block {header['index']}")
+                return
+            for i, transaction in zip(missing, reply['transactions']):
+                transactions[i] = transaction
+        
+        block_data = dict(header, transactions=transactions)
+        if not self.ingest.submit(block_data, sender):
+            print(f"⚠️  Ingestion pipeline full, dropped block {header['index']}")
+    
+    def on_block_linked(self, block, source):
+        """
+        Called by the ingestion pipeline after a peer block is appended.
+        The announcement is left to the relay thread so slow peers never
+        hold up the linker.
+        """
+        print(f"🔗 Added block {block.index} from peer")
+        if source:
+            self.peer_manager.record_useful_block(source)
+        with self._relay_lock:
+            self._announce_queue.append((block, source))
+        self._relay_wakeup.set()
+    
+    def on_invalid_block(self, source):
+        """Called by the ingestion pipeline when a peer sent an invalid block"""
+        self.peer_manager.record_invalid_block(source)
+        self.drop_peer(source)
+    
+    def broadcast_block(self, block, exclude=None):
+        """
+        Announce a block to all peers as a compact block: the header plus
+        short transaction ids, which peers resolve from their own pools
+        :param exclude: Peer that should not receive the announcement
+        """
+        header = header_from_block(block)
+        # Mining rewards never pass through peers' pools, so send them inline
+        prefilled = {}
+        for i, transaction in enumerate(block.transactions):
+            tx = Transaction.from_dict(transaction)
+            if tx is not None and tx.is_coinbase:
+                prefilled[i] = transaction
+        
+        message = {
+            'type': 'compact_block',
+            'header': header,
+            'short_ids': [short_id(tx) for tx in block.transactions],
+            'prefilled': prefilled
+        }
+        
+        for peer in self.peer_manager.rank(self.peers):
+            if peer == exclude:
+                continue
+            if self.send_to_peer(peer, message):
+                print(f"📤 Sent block {block.index} to {peer[0]}:{peer[1]}")
+    
+    def start_miner(self, max_latency=5.0, workers=None, save_file=None,
+                    miner_address=None):
+        """
+        Start continuous background mining; mined blocks are saved and broadcast
+        :param max_latency: Seconds a transaction may wait before a block is cut
+        :param workers: Number of mining processes (default: CPU count, or
+                        the shared pool's size when the node has one)
+        :param save_file: Chain file (default: the file of this node's chain)
+        :param miner_address: Optional account credited with block rewards
+        """
+        if self.miner and self.miner.running:
+            print("⚠️  Miner already running")
+            return self.miner
+        if self.miner:
+            self.miner.stop()  # Release the processes of a miner that died
+        self.miner = MiningService(
+            self.blockchain,
+            node=self,
+            workers=workers,
+            max_latency=max_latency,
+            save_file=save_file or chain_filename(self.chain_id),
+            miner_address=miner_address,
+            pool=self.pool,
+            chain_id=self.chain_id
+        )
+        self.miner.start()
+        return self.miner
+    
+    def stop_miner(self):
+        """Stop the background miner if it is running"""
+        if self.miner:
+            self.miner.stop()
+    
+    def start_query_api(self, port, host='127.0.0.1'):
+        """
+        Serve read-only HTTP/JSON queries about the chain
+        :param port: HTTP port (separate from the peer port)
+        :param host: Address to bind to (local only by default)
+        """
+        if self.query_api is None:
+            self.query_api = QueryAPI(self.blockchain, host, port)
+            self.query_api.start()
+        return self.query_api
+    
     def stop(self):
         """Stop the node"""
+        self.stop_miner()
+        if self.query_api:
+            self.query_api.stop()
         self.running = False
+        self._relay_wakeup.set()
+        self.ingest.stop()
+        self.blockchain.remove_tip_listener(self.mark_block_seen)
+        self.peer_manager.save()
         if self.server_socket:
             self.server_socket.close()
         print("🛑 Node stopped")
 
+class ChainHost:
+    def __init__(self, host, port, chains, workers=None, max_outbound=8, max_inbound=16,
+                 peers_file=None):
+        """
+        One listening socket serving several independent chains
+        
+        Each chain keeps its own Node (difficulty, pending pool, miner,
+        ingestion pipeline); incoming messages are routed by their 'chain'
+        tag. Mining and block checks of all chains share one process pool,
+        and peers share one address book.
+        
+        :param host: IP address to bind to
+        :param port: Port to listen on
+        :param chains: Dictionary of chain name -> Blockchain
+        :param workers: Processes in the shared pool (default: CPU count)
+        """
+        self.host = host
+        self.port = port
+        self.pool = SharedWorkerPool(workers)
+        self.peer_manager = PeerManager(peers_file or f"peers_{port}.json", max_outbound, max_inbound)
+        self.nodes = {
+            name: Node(host, port, blockchain, chain_id=name, pool=self.pool,
+                       peer_manager=self.peer_manager)
+            for name, blockchain in chains.items()
+        }
+        self.server_socket = None
+        self.running = False
+        self._connection_slots = threading.BoundedSemaphore(MAX_CONNECTION_THREADS)
+    
+    def start(self):
+        """Start the shared pool, every chain's node and the listener"""
+        self.running = True
+        self.pool.start()
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.bind((self.host, self.port))
+        self.server_socket.listen(5)
+        for node in self.nodes.values():
+            node.start(listen=False)
+        print(f"🖥️  Node started at {self.host}:{self.port} with chains: {', '.join(self.nodes)}")
+        threading.Thread(target=self.accept_connections, daemon=True).start()
+    
+    def accept_connections(self):
+        """Accept incoming connections"""
+        while self.running:
+            try:
+                self._connection_slots.acquire()
+                try:
+                    client_socket, addr = self.server_socket.accept()
+                except:
+                    self._connection_slots.release()
+                    raise
+                threading.Thread(
+                    target=self.handle_connection,
+                    args=(client_socket,),
+                    daemon=True
+                ).start()
+            except:
+                if self.running:
+                    print("⚠️  Error accepting connection")
+    
+    def handle_connection(self, client_socket):
+        """Route one message to the node of the chain it is tagged with"""
+        try:
+            with client_socket:
+                try:
+                    message = recv_message(client_socket)
+                except Exception as e:
+                    print(f"⚠️  Connection error: {e}")
+                    return
+                if not message:
+                    return
+                node = self.nodes.get(message.get('chain', DEFAULT_CHAIN))
+                if node is None:
+                    send_message(client_socket, {'type': 'reject', 'reason': 'unknown chain'})
+                    return
+                node.dispatch(message, client_socket)
+        finally:
+            self._connection_slots.release()
+    
+    def connect_to_peer(self, peer_host, peer_port):
+        """
+        Connect every hosted chain to a peer; chains the peer does not
+        host are rejected by it. Returns the names of the connected chains.
+        """
+        return [name for name, node in self.nodes.items() if node.connect_to_peer(peer_host, peer_port)]
+    
+    def start_miners(self, max_latency=5.0, miner_address=None):
+        """Start a miner per chain, all scheduled on the shared pool"""
+        for node in self.nodes.values():
+            node.start_miner(max_latency, miner_address=miner_address)
+    
+    def stop(self):
+        """Stop every chain, then the shared pool"""
+        self.running = False
+        for node in self.nodes.values():
+            node.stop()
+        self.pool.stop()
+        self.peer_manager.save()
+        if self.server_socket:
+            self.server_socket.close()
+
 # Test the networking
 if __name__ == "__main__":
     # Create blockchain
@@ -181,4 +816,4 @@ if __name__ == "__main__":
     
     # Stop nodes
     node1.stop()
-    node2.stop()
\ No newline at end of file
+    node2.stop()
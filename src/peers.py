@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+
+RTT_SMOOTHING = 0.3  # Weight of the newest round-trip sample
+BAN_SECONDS = 600  # How long a misbehaving peer is ignored
+MAX_ADDRESSES = 1000  # Address book capacity
+PEERS_PER_REPLY = 50  # Addresses returned for one get_peers request
+
+class PeerManager:
+    def __init__(self, filename="peers.json", max_outbound=8, max_inbound=16,
+                 ban_seconds=BAN_SECONDS):
+        """
+        Persistent address book with per-peer scoring and bans
+
+        :param filename: JSON file the address book is saved to
+        :param max_outbound: Peers this node connects out to
+        :param max_inbound: Peers allowed to connect to this node
+        :param ban_seconds: How long peers that send invalid blocks are ignored
+        """
+        self.filename = filename
+        self.max_outbound = max_outbound
+        self.max_inbound = max_inbound
+        self.ban_seconds = ban_seconds
+        self.book = {}  # (host, port) -> stats record
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _new_record():
+        return {
+            'rtt_ms': None,
+            'successes': 0,
+            'failures': 0,
+            'useful_blocks': 0,
+            'invalid_blocks': 0,
+            'banned_until': 0,
+            'last_seen': None
+        }
+
+    def _record(self, peer):
+        """Get or create the stats of a peer; caller holds the lock"""
+        peer = tuple(peer)
+        if peer not in self.book:
+            if len(self.book) >= MAX_ADDRESSES:
+                # Forget the worst peer to make room
+                del self.book[min(self.book, key=self._score)]
+            self.book[peer] = self._new_record()
+        return self.book[peer]
+
+    def add_addresses(self, addresses):
+        """Learn peer addresses from peer exchange or connections"""
+        with self._lock:
+            for host, port in addresses:
+                self._record((host, port))
+
+    def record_success(self, peer, rtt):
+        """Fold a measured round-trip time (seconds) into the peer's stats"""
+        with self._lock:
+            record = self._record(peer)
+            sample = rtt * 1000
+            if record['rtt_ms'] is None:
+                record['rtt_ms'] = sample
+            else:
+                record['rtt_ms'] += RTT_SMOOTHING * (sample - record['rtt_ms'])
+            record['successes'] += 1
+            record['last_seen'] = time.time()
+
+    def record_failure(self, peer):
+        with self._lock:
+            self._record(peer)['failures'] += 1
+
+    def record_useful_block(self, peer):
+        """A block from this peer extended our chain"""
+        with self._lock:
+            self._record(peer)['useful_blocks'] += 1
+
+    def record_invalid_block(self, peer):
+        """Ban a peer that sent an invalid block"""
+        with self._lock:
+            record = self._record(peer)
+            record['invalid_blocks'] += 1
+            record['banned_until'] = time.time() + self.ban_seconds
+        print(f"🚫 Banned {peer[0]}:{peer[1]} for {self.ban_seconds}s (invalid block)")
+
+    def is_banned(self, peer):
+        """
+        A ban of (host, None), a sender that never identified its port,
+        covers every port of that host
+        """
+        now = time.time()
+        with self._lock:
+            return any(self.book.get(key, {}).get('banned_until', 0) > now
+                       for key in (tuple(peer), (peer[0], None)))
+
+    def _score(self, peer):
+        """
+        Higher is better: reliability and useful blocks add, latency and
+        failures subtract. Unmeasured peers get a neutral latency penalty.
+        """
+        record = self.book[peer]
+        attempts = record['successes'] + record['failures']
+        failure_rate = record['failures'] / attempts if attempts else 0.5
+        rtt_penalty = record['rtt_ms'] / 100 if record['rtt_ms'] is not None else 5
+        return min(record['useful_blocks'], 100) * 0.1 - failure_rate * 10 - rtt_penalty
+
+    def score(self, peer):
+        with self._lock:
+            if tuple(peer) not in self.book:
+                return None
+            return self._score(tuple(peer))
+
+    def rank(self, peers):
+        """Order peers best first, dropping banned ones"""
+        now = time.time()
+        with self._lock:
+            usable = [tuple(p) for p in peers
+                      if self.book.get(tuple(p), {}).get('banned_until', 0) <= now]
+            for peer in usable:
+                self._record(peer)
+            return sorted(usable, key=self._score, reverse=True)
+
+    def addresses(self, exclude=None, limit=PEERS_PER_REPLY):
+        """Best known, non-banned addresses to share with a peer"""
+        ranked = self.rank(self.dialable())
+        return [list(peer) for peer in ranked if peer != exclude][:limit]
+
+    def dialable(self):
+        """Known addresses with a port to connect to"""
+        with self._lock:
+            return [peer for peer in self.book if peer[1] is not None]
+
+    def stats(self, peer):
+        with self._lock:
+            return dict(self.book.get(tuple(peer), self._new_record()))
+
+    def load(self):
+        """Load the address book; bans survive restarts"""
+        try:
+            with open(self.filename, 'r') as f:
+                entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        with self._lock:
+            for entry in entries:
+                record = self._new_record()
+                record.update(entry['stats'])
+                self.book[(entry['host'], entry['port'])] = record
+
+    def save(self):
+        """Write the address book atomically"""
+        with self._lock:
+            entries = [
+                {'host': host, 'port': port, 'stats': record}
+                for (host, port), record in self.book.items()
+            ]
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_filename, self.filename)
@@ -0,0 +1,229 @@
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from transaction import transaction_id
+
+CACHE_SIZE = 256  # Cached responses; all are dropped when the chain version changes
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+SUMMARY_WINDOW = 20  # Recent blocks used for the average block time
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class QueryAPI:
+    def __init__(self, blockchain, host='127.0.0.1', port=8000, cache_size=CACHE_SIZE):
+        """
+        Read-only HTTP/JSON view of a blockchain
+
+        Every response is derived from the chain at one tip and the
+        settings the responses show (difficulty, pruned height), so
+        responses are cached per chain version and the version doubles as
+        the ETag.
+
+        :param blockchain: Blockchain instance to serve
+        :param host: Address to bind to (local only by default)
+        :param port: Port to listen on
+        :param cache_size: Maximum number of cached responses
+        """
+        self.blockchain = blockchain
+        self.host = host
+        self.port = port
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (path, query) -> encoded body, all for _cache_version
+        self._cache_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.server = None
+
+    def start(self):
+        """Serve requests from a background thread"""
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                api.handle(self)
+
+            def log_message(self, format, *args):
+                pass  # Keep the node console quiet
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"🔎 Query API at http://{self.host}:{self.port}/")
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def handle(self, request):
+        """
+        Answer one GET request, from cache when the chain version is
+        unchanged. Only successful responses are cached, so 304 is sent
+        only for a valid request whose response would match the ETag.
+        """
+        url = urlsplit(request.path)
+        path = url.path.rstrip('/') or '/'
+        query = parse_qs(url.query)
+        key = (path, tuple(sorted((name, tuple(values)) for name, values in query.items())))
+        # Only the tip is read on the fast path; the chain is copied on a miss
+        version = self._version(self.blockchain.last_block.hash)
+        status = 200
+        body = self._cached(version, key)
+        if body is None:
+            chain = self.blockchain.snapshot()
+            version = self._version(chain[-1].hash)
+            try:
+                body = json.dumps(self.route(chain, path, query)).encode()
+                self._store(version, key, body)
+            except QueryError as e:
+                status = e.status
+                body = json.dumps({'error': str(e)}).encode()
+        etag = f'"{version}"'
+
+        if status == 200 and request.headers.get('If-None-Match') == etag:
+            request.send_response(304)
+            request.send_header('ETag', etag)
+            request.end_headers()
+            return
+
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            request.send_header('ETag', etag)
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _version(self, tip_hash):
+        """Tip hash plus the chain settings that appear in responses"""
+        return f"{tip_hash}-{self.blockchain.difficulty}-{self.blockchain.pruned_height}"
+
+    def _cached(self, version, key):
+        with self._lock:
+            if version != self._cache_version:
+                # A new tip or setting invalidates every response at once
+                self._cache.clear()
+                self._cache_version = version
+            body = self._cache.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def _store(self, version, key, body):
+        with self._lock:
+            if version != self._cache_version:
+                return  # Chain moved on while this response was built
+            self._cache[key] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+    def route(self, chain, path, query):
+        """Build the JSON document for a path against one chain snapshot"""
+        parts = path.strip('/').split('/')
+        if path == '/' or parts == ['summary']:
+            return self.summary(chain)
+        if parts == ['blocks']:
+            return self.blocks(chain, *self._page(query))
+        if len(parts) == 2 and parts[0] == 'blocks':
+            return self.block(chain, self._int(parts[1], 'height'))
+        if parts == ['transactions']:
+            return self.transactions(chain, *self._page(query))
+        raise QueryError(404, f"Unknown path {path}")
+
+    @staticmethod
+    def _int(value, name):
+        try:
+            return int(value)
+        except ValueError:
+            raise QueryError(400, f"{name} must be an integer")
+
+    def _page(self, query):
+        """Page number and page size from ?page=&limit="""
+        page = self._int(query.get('page', ['0'])[0], 'page')
+        limit = self._int(query.get('limit', [str(DEFAULT_PAGE_SIZE)])[0], 'limit')
+        if page < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+            raise QueryError(400, f"page must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}")
+        return page, limit
+
+    def summary(self, chain):
+        tip = chain[-1]
+        recent = chain[-SUMMARY_WINDOW:]
+        average = None
+        if len(recent) > 1:
+            average = (recent[-1].timestamp - recent[0].timestamp) / (len(recent) - 1)
+        return {
+            'height': tip.index,
+            'length': len(chain),
+            'tip_hash': tip.hash,
+            'tip_timestamp': tip.timestamp,
+            'difficulty': self.blockchain.difficulty,
+            'pruned_height': self.blockchain.pruned_height,
+            'average_block_time': average
+        }
+
+    @staticmethod
+    def _block_summary(block):
+        return {
+            'index': block.index,
+            'hash': block.hash,
+            'previous_hash': block.previous_hash,
+            'timestamp': block.timestamp,
+            'nonce': block.nonce,
+            'tx_root': block.tx_root,
+            'transactions': None if block.transactions is None else len(block.transactions)
+        }
+
+    def blocks(self, chain, page, limit):
+        """Block headers, newest first; pruned bodies are not loaded"""
+        stop = len(chain) - page * limit
+        start = max(stop - limit, 0)
+        return {
+            'page': page,
+            'limit': limit,
+            'total': len(chain),
+            'blocks': [self._block_summary(block) for block in reversed(chain[start:max(stop, 0)])]
+        }
+
+    def block(self, chain, height):
+        if not 0 <= height < len(chain):
+            raise QueryError(404, f"No block at height {height}")
+        return dict(self.blockchain.full_block(chain[height]).__dict__)
+
+    def transactions(self, chain, page, limit):
+        """
+        Confirmed transactions, newest first. Walks back from the tip and
+        stops once the page is filled, so recent pages are cheap.
+        """
+        skip = page * limit
+        items = []
+        for block in reversed(chain):
+            transactions = self.blockchain.full_block(block).transactions
+            if transactions is None:
+                break  # Older bodies were discarded
+            for tx in reversed(transactions):
+                if skip:
+                    skip -= 1
+                    continue
+                items.append({
+                    'txid': transaction_id(tx),
+                    'block': block.index,
+                    'transaction': tx
+                })
+                if len(items) == limit:
+                    return {'page': page, 'limit': limit, 'transactions': items}
+        return {'page': page, 'limit': limit, 'transactions': items}
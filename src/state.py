@@ -0,0 +1,163 @@
+import json
+import os
+from collections import OrderedDict
+from transaction import Transaction, transaction_id
+
+class AccountState:
+    def __init__(self, max_undo_depth=100):
+        """
+        Account balances, nonces and history derived from the chain.
+        Updated block by block so queries never rescan the chain.
+
+        :param max_undo_depth: Number of recent blocks that can be reverted
+                               cheaply during a reorg
+        """
+        self.balances = {}  # account -> balance
+        self.nonces = {}  # account -> next expected nonce
+        self.history = {}  # account -> [height, txid, sender, recipient, amount] entries
+        self.height = -1  # Index of the last applied block
+        self.tip_hash = None
+        self.max_undo_depth = max_undo_depth
+        self._undo = OrderedDict()  # height -> undo record
+
+    def balance(self, account):
+        return self.balances.get(account, 0)
+
+    def next_nonce(self, account):
+        return self.nonces.get(account, 0)
+
+    def check_block(self, block, max_reward):
+        """
+        Check that a block's structured transactions apply on this state
+        Returns True if valid, False otherwise
+        """
+        balances = {}
+        nonces = {}
+        for position, data in enumerate(block.transactions):
+            tx = Transaction.from_dict(data)
+            if tx is None:
+                continue  # Legacy free-form transaction
+            if not tx.is_well_formed():
+                print(f"❌ Block {block.index}: Malformed transaction {position}")
+                return False
+            if tx.is_coinbase:
+                if position != 0 or tx.amount > max_reward or tx.nonce != block.index:
+                    print(f"❌ Block {block.index}: Invalid mining reward")
+                    return False
+            else:
+                balance = balances.get(tx.sender, self.balance(tx.sender))
+                nonce = nonces.get(tx.sender, self.next_nonce(tx.sender))
+                if tx.nonce != nonce:
+                    print(f"❌ Block {block.index}: Bad nonce for {tx.sender} (expected {nonce})")
+                    return False
+                if balance < tx.amount:
+                    print(f"❌ Block {block.index}: {tx.sender} has insufficient balance")
+                    return False
+                balances[tx.sender] = balance - tx.amount
+                nonces[tx.sender] = nonce + 1
+            balances[tx.recipient] = balances.get(tx.recipient, self.balance(tx.recipient)) + tx.amount
+        return True
+
+    def apply_block(self, block):
+        """
+        Apply a block that has already passed check_block
+        Records an undo entry so the block can be reverted on reorg.
+        """
+        undo = {'tip_hash': self.tip_hash, 'balances': {}, 'nonces': {}, 'history': {}}
+        for data in block.transactions:
+            tx = Transaction.from_dict(data)
+            if tx is None:
+                continue
+            entry = [block.index, transaction_id(data), tx.sender, tx.recipient, tx.amount]
+            if not tx.is_coinbase:
+                self._remember(undo, tx.sender)
+                self.balances[tx.sender] = self.balance(tx.sender) - tx.amount
+                self.nonces[tx.sender] = tx.nonce + 1
+                self.history.setdefault(tx.sender, []).append(entry)
+            self._remember(undo, tx.recipient)
+            self.balances[tx.recipient] = self.balance(tx.recipient) + tx.amount
+            if tx.recipient != tx.sender:
+                self.history.setdefault(tx.recipient, []).append(entry)
+
+        self.height = block.index
+        self.tip_hash = block.hash
+        self._undo[block.index] = undo
+        while len(self._undo) > self.max_undo_depth:
+            self._undo.popitem(last=False)
+
+    def revert_block(self, block):
+        """
+        Undo the most recently applied block
+        Returns False if no undo record is kept for it (too deep).
+        """
+        if block.index != self.height or block.index not in self._undo:
+            return False
+        undo = self._undo.pop(block.index)
+        for account, balance in undo['balances'].items():
+            if balance is None:
+                self.balances.pop(account, None)
+            else:
+                self.balances[account] = balance
+        for account, nonce in undo['nonces'].items():
+            if nonce is None:
+                self.nonces.pop(account, None)
+            else:
+                self.nonces[account] = nonce
+        for account, length in undo['history'].items():
+            if length:
+                del self.history[account][length:]
+            else:
+                self.history.pop(account, None)
+        self.height -= 1
+        self.tip_hash = undo['tip_hash']
+        return True
+
+    def _remember(self, undo, account):
+        """Record an account's values before its first change in a block"""
+        if account not in undo['balances']:
+            undo['balances'][account] = self.balances.get(account)
+            undo['nonces'][account] = self.nonces.get(account)
+            undo['history'][account] = len(self.history.get(account, []))
+
+    def to_dict(self):
+        """Serialize for a checkpoint (undo records are not persisted)"""
+        return {
+            "height": self.height,
+            "tip_hash": self.tip_hash,
+            "balances": dict(self.balances),
+            "nonces": dict(self.nonces),
+            "history": {account: list(entries) for account, entries in self.history.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.height = data['height']
+        state.tip_hash = data['tip_hash']
+        state.balances = data['balances']
+        state.nonces = data['nonces']
+        state.history = data['history']
+        return state
+
+    @staticmethod
+    def save_checkpoint(data, filename):
+        """
+        Atomically write a checkpoint produced by to_dict()
+        Callers snapshot under their lock, then write outside it.
+        """
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load_checkpoint(cls, filename):
+        """Load a checkpoint, or None if there is none"""
+        try:
+            with open(filename, 'r') as f:
+                return cls.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def __repr__(self):
+        return f"AccountState<height={self.height}, accounts={len(self.balances)}>"
@@ -0,0 +1,84 @@
+import json
+import lzma
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+SEGMENT_SIZE = 100  # Blocks per archived segment
+CACHED_SEGMENTS = 4  # Decompressed segments kept in memory
+
+COMPRESSORS = {
+    'lzma': ('.json.xz', lzma.compress, lzma.decompress),
+    'zlib': ('.json.zz', lambda data: zlib.compress(data, 9), zlib.decompress),
+}
+
+def segment_directory(filename):
+    """Directory holding the cold segments of a chain file"""
+    base, _ = os.path.splitext(filename)
+    return base + "_segments"
+
+class SegmentStore:
+    def __init__(self, directory, compression='lzma'):
+        """
+        Compressed cold storage for transaction bodies of pruned blocks
+
+        :param directory: Where segment files are written
+        :param compression: 'lzma' (smaller) or 'zlib' (faster)
+        """
+        self.directory = directory
+        self.compression = compression
+        self._cache = OrderedDict()  # segment start -> list of bodies
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def segment_start(index):
+        return index - index % SEGMENT_SIZE
+
+    def _path(self, start, compression):
+        extension = COMPRESSORS[compression][0]
+        return os.path.join(self.directory, f"segment_{start:08d}{extension}")
+
+    def write_segment(self, start, bodies):
+        """
+        Compress and store the transaction lists of blocks start..start+len-1
+        Written to a temporary file first so a crash never leaves half a segment.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        compress = COMPRESSORS[self.compression][1]
+        payload = compress(json.dumps({"start": start, "bodies": bodies}).encode())
+        path = self._path(start, self.compression)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(payload)
+        os.replace(path + ".tmp", path)
+
+    def load_transactions(self, index):
+        """
+        Return the archived transactions of a block, decompressing its
+        segment on first use. Returns None if the segment is not archived.
+        """
+        start = self.segment_start(index)
+        with self._lock:
+            bodies = self._cache.get(start)
+            if bodies is not None:
+                self._cache.move_to_end(start)
+                return bodies[index - start]
+
+        bodies = self._read_segment(start)
+        if bodies is None:
+            return None
+        with self._lock:
+            self._cache[start] = bodies
+            while len(self._cache) > CACHED_SEGMENTS:
+                self._cache.popitem(last=False)
+        return bodies[index - start]
+
+    def _read_segment(self, start):
+        # Segments may have been written with either compressor
+        for compression, (_, _, decompress) in COMPRESSORS.items():
+            try:
+                with open(self._path(start, compression), 'rb') as f:
+                    return json.loads(decompress(f.read()))["bodies"]
+            except FileNotFoundError:
+                continue
+        return None
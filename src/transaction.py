@@ -0,0 +1,69 @@
+import hashlib
+import json
+
+COINBASE = "coinbase"  # Sender of mining reward transactions
+
+class Transaction:
+    def __init__(self, sender, recipient, amount, nonce):
+        """
+        Initialize a structured transfer
+
+        :param sender: Paying account (COINBASE for mining rewards)
+        :param recipient: Receiving account
+        :param amount: Positive whole number of coins
+        :param nonce: Per-sender sequence number, starting at 0
+        """
+        self.sender = sender
+        self.recipient = recipient
+        self.amount = amount
+        self.nonce = nonce
+
+    @property
+    def is_coinbase(self):
+        return self.sender == COINBASE
+
+    @property
+    def txid(self):
+        """SHA-256 of the canonical serialized transaction"""
+        return transaction_id(self.to_dict())
+
+    def to_dict(self):
+        """Serialize to the form stored in blocks"""
+        return {
+            "sender": self.sender,
+            "recipient": self.recipient,
+            "amount": self.amount,
+            "nonce": self.nonce
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a Transaction from block data
+        Returns None for legacy free-form (string) transactions.
+        """
+        if not is_structured(data):
+            return None
+        return cls(data['sender'], data['recipient'], data['amount'], data['nonce'])
+
+    def is_well_formed(self):
+        """Check field types without looking at account state"""
+        return (
+            isinstance(self.sender, str) and self.sender != ""
+            and isinstance(self.recipient, str) and self.recipient != ""
+            and self.recipient != COINBASE
+            and isinstance(self.amount, int) and not isinstance(self.amount, bool)
+            and self.amount > 0
+            and isinstance(self.nonce, int) and self.nonce >= 0
+        )
+
+    def __repr__(self):
+        return f"Transaction({self.sender} -> {self.recipient}: {self.amount}, nonce={self.nonce})"
+
+def is_structured(data):
+    """True if block transaction data is a structured transfer"""
+    return isinstance(data, dict) and {"sender", "recipient", "amount", "nonce"} <= data.keys()
+
+def transaction_id(data):
+    """SHA-256 id for any transaction stored in a block (structured or legacy)"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+class SharedWorkerPool:
+    def __init__(self, workers=None):
+        """
+        One process pool shared by the miners and block validators of
+        several chains
+
+        Tasks wait in a queue per chain and are handed to the processes
+        round-robin across chains, so a chain with a deep backlog (a busy
+        miner) cannot starve the others. At most `workers` tasks run at once.
+
+        :param workers: Number of processes (default: CPU count)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._queues = OrderedDict()  # chain id -> deque of (future, fn, args)
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._executor = None
+        self._thread = None
+        self.running = False
+        self.completed = {}  # chain id -> tasks run
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop dispatching; queued tasks are cancelled"""
+        with self._cond:
+            if not self.running:
+                return
+            self.running = False
+            for tasks in self._queues.values():
+                for future, _, _ in tasks:
+                    future.cancel()
+            self._queues.clear()
+            self._cond.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    def submit(self, chain_id, fn, *args, urgent=False):
+        """
+        Queue fn(*args) on behalf of a chain. Returns a Future; it can be
+        cancelled until the task is handed to a process.
+        :param urgent: Run before the chain's other queued tasks (validation
+                       should not wait behind mining chunks)
+        """
+        future = Future()
+        with self._cond:
+            if not self.running:
+                raise RuntimeError("Worker pool is not running")
+            tasks = self._queues.setdefault(chain_id, deque())
+            if urgent:
+                tasks.appendleft((future, fn, args))
+            else:
+                tasks.append((future, fn, args))
+            self._cond.notify_all()
+        return future
+
+    def stats(self):
+        """Queued and completed tasks per chain"""
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'running': self._in_flight,
+                'queued': {chain_id: len(tasks) for chain_id, tasks in self._queues.items()},
+                'completed': dict(self.completed)
+            }
+
+    def _next_task(self):
+        """Pop a task from the next chain in round-robin order; caller holds the lock"""
+        for chain_id in list(self._queues):
+            tasks = self._queues[chain_id]
+            # The chain just served goes to the back of the rotation
+            self._queues.move_to_end(chain_id)
+            while tasks:
+                future, fn, args = tasks.popleft()
+                if future.set_running_or_notify_cancel():
+                    return chain_id, future, fn, args
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                task = None
+                while self.running:
+                    if self._in_flight < self.workers:
+                        task = self._next_task()
+                        if task:
+                            break
+                    self._cond.wait()
+                if not self.running:
+                    return
+                self._in_flight += 1
+            chain_id, future, fn, args = task
+            self._executor.submit(fn, *args).add_done_callback(
+                lambda done, chain_id=chain_id, future=future: self._finish(chain_id, future, done))
+
+    def _finish(self, chain_id, future, done):
+        with self._cond:
+            self._in_flight -= 1
+            self.completed[chain_id] = self.completed.get(chain_id, 0) + 1
+            self._cond.notify_all()
+        if done.cancelled():
+            future.set_exception(RuntimeError("Worker pool stopped"))
+        elif done.exception() is not None:
+            future.set_exception(done.exception())
+        else:
+            future.set_result(done.result())
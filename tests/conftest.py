@@ -0,0 +1,29 @@
+import os
+import socket
+import sys
+import time
+import pytest
+
+# Modules import each other by name, as when running src/cli.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+@pytest.fixture
+def free_port():
+    """Return a function giving a port nothing is listening on"""
+    def pick():
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()[1]
+    return pick
+
+@pytest.fixture
+def wait_for():
+    """Return a function polling a condition until it holds or times out"""
+    def wait(condition, timeout=10):
+        deadline = time.time() + timeout
+        while not condition():
+            if time.time() > deadline:
+                return False
+            time.sleep(0.02)
+        return True
+    return wait
@@ -0,0 +1,152 @@
+import threading
+import time
+import pytest
+from block import Block
+from blockchain import Blockchain, MINING_REWARD
+from transaction import Transaction, COINBASE
+
+def sibling(blockchain, difficulty=1):
+    """Empty chain sharing the genesis block of blockchain"""
+    other = Blockchain(difficulty=difficulty)
+    other.chain[0] = blockchain.chain[0]
+    return other
+
+def mined_block(previous, transactions, difficulty=1):
+    block = Block(previous.index + 1, transactions, time.time(), previous.hash)
+    return block.mine_block(difficulty)
+
+def test_mining_restarts_when_a_peer_block_arrives():
+    bc = Blockchain(difficulty=1)
+    peer_block = bc.create_block_template(miner_address="peer")
+    peer_block.mine_block(1)
+
+    bc.difficulty = 8  # Slow enough that the peer block always wins
+    result = []
+    thread = threading.Thread(target=lambda: result.append(bc.mine_pending_transactions("alice")))
+    thread.start()
+    time.sleep(0.3)
+    bc.difficulty = 1  # Only affects the restarted attempt
+    assert bc.link_block(peer_block)
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert result[0].index == 2
+    assert result[0].previous_hash == peer_block.hash
+
+def test_readers_see_a_consistent_snapshot_while_mining():
+    bc = Blockchain(difficulty=1)
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            chain = bc.snapshot()
+            if not all(chain[i].previous_hash == chain[i - 1].hash for i in range(1, len(chain))):
+                errors.append(len(chain))
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for i in range(10):
+        bc.add_transaction(f"Transaction {i}")
+        bc.mine_pending_transactions()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(bc.chain) == 11
+    assert bc.is_chain_valid()
+
+def test_tampering_is_detected():
+    bc = Blockchain(difficulty=1)
+    bc.add_transaction("Alice pays Bob 1 BTC")
+    bc.mine_pending_transactions()
+    assert bc.is_chain_valid()
+    bc.chain[1].transactions = ["HACKED"]
+    assert not bc.is_chain_valid()
+
+def test_reward_only_block_bootstraps_a_balance():
+    bc = Blockchain(difficulty=1)
+    assert bc.create_block_template() is None
+    block = bc.mine_pending_transactions("alice")
+    assert block.transactions == [Transaction(COINBASE, "alice", MINING_REWARD, 1).to_dict()]
+    assert bc.get_balance("alice") == MINING_REWARD
+
+def test_transfers_are_checked_against_the_pool():
+    bc = Blockchain(difficulty=1)
+    bc.mine_pending_transactions("alice")
+    assert bc.add_transaction(Transaction("alice", "bob", 30, 0)) == 2
+    assert bc.add_transaction(Transaction("alice", "bob", 30, 1)) is None  # Overspends
+    assert bc.add_transaction(Transaction("alice", "bob", 10, 0)) is None  # Reused nonce
+    assert bc.next_nonce("alice") == 1
+
+def test_replace_chain_adopts_a_longer_chain():
+    bc = Blockchain(difficulty=1)
+    bc.mine_pending_transactions("alice")
+    other = sibling(bc)
+    other.mine_pending_transactions("bob")
+    other.mine_pending_transactions("bob")
+
+    assert bc.replace_chain(other.snapshot())
+    assert bc.last_block.hash == other.last_block.hash
+    assert bc.get_balance("alice") == 0
+    assert bc.get_balance("bob") == 100
+    assert bc.get_pending() == []  # Mining rewards never return to the pool
+
+def test_replace_chain_rolls_back_an_invalid_branch():
+    bc = Blockchain(difficulty=1)
+    bc.mine_pending_transactions("alice")
+    before = bc.snapshot()
+    other = sibling(bc)
+    other.mine_pending_transactions("bob")
+    overspend = Transaction("bob", "carol", 500, 0).to_dict()
+    new_chain = other.snapshot() + [mined_block(other.last_block, [overspend])]
+
+    assert not bc.replace_chain(new_chain)
+    assert [block.hash for block in bc.snapshot()] == [block.hash for block in before]
+    assert bc.get_balance("alice") == 50
+    assert bc.get_balance("bob") == 0
+    assert bc.state.height == 1
+
+def test_peer_blocks_must_meet_the_difficulty():
+    weak = Blockchain(difficulty=0)
+    for _ in range(2):
+        weak.mine_pending_transactions("mallory")
+    weak_blocks = [block for block in weak.chain[1:] if not block.hash.startswith("000")]
+    bc = sibling(weak, difficulty=3)
+
+    assert not bc.add_block_from_peer(dict(weak_blocks[0].__dict__))
+    assert not bc.replace_chain(weak.snapshot())
+    assert len(bc.chain) == 1
+
+def test_replace_chain_refuses_blocks_without_bodies():
+    bc = Blockchain(difficulty=1)
+    bc.mine_pending_transactions("alice")
+    other = sibling(bc)
+    other.mine_pending_transactions("bob")
+    other.mine_pending_transactions("bob")
+    new_chain = other.snapshot()
+    new_chain[1] = Block.from_dict(dict(new_chain[1].__dict__, transactions=None))
+
+    assert not bc.replace_chain(new_chain)
+    assert bc.get_balance("alice") == 50
+    assert bc.get_balance("bob") == 0
+    assert bc.state.height == 1
+
+def test_replace_chain_restores_state_after_an_error():
+    bc = Blockchain(difficulty=1)
+    bc.mine_pending_transactions("alice")
+    other = sibling(bc)
+    other.mine_pending_transactions("bob")
+    other.mine_pending_transactions("bob")
+
+    def broken(block, max_reward):
+        raise RuntimeError("state check failed")
+    bc.state.check_block = broken
+    with pytest.raises(RuntimeError):
+        bc.replace_chain(other.snapshot())
+
+    assert len(bc.chain) == 2
+    assert bc.get_balance("alice") == 50
+    assert bc.get_balance("bob") == 0
+    assert bc.state.tip_hash == bc.last_block.hash
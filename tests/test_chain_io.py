@@ -0,0 +1,112 @@
+import json
+import subprocess
+import sys
+import time
+import pytest
+from block import Block, HASH_VERSION
+from blockchain import Blockchain, MINING_REWARD
+from chain_io import export_chain, import_chain, iter_chain_file, ChainFileError
+from transaction import Transaction, COINBASE
+
+@pytest.fixture
+def chain():
+    bc = Blockchain(difficulty=2)
+    bc.mine_pending_transactions("alice")
+    bc.add_transaction(Transaction("alice", "bob", 5, 0))
+    bc.add_transaction("Legacy free-form transaction")
+    bc.mine_pending_transactions("alice")
+    return bc
+
+@pytest.mark.parametrize("fmt", ["jsonl", "binary"])
+def test_export_import_round_trip(chain, tmp_path, fmt):
+    dump = tmp_path / f"chain.{fmt}"
+    target = tmp_path / "blockchain.json"
+    blocks = [dict(block.__dict__) for block in chain.chain]
+
+    assert export_chain(iter(blocks), str(dump), fmt, {'difficulty': chain.difficulty}) == 3
+    assert import_chain(str(dump), str(target), MINING_REWARD) == 3
+
+    imported = Blockchain.load_from_file(str(target))
+    assert imported.is_chain_valid()
+    assert [dict(block.__dict__) for block in imported.chain] == blocks
+    assert imported.get_balance("bob") == 5
+
+def test_import_rejects_insufficient_proof_of_work(chain, tmp_path):
+    weak = Block(3, ["Cheap block"], time.time(), chain.last_block.hash)
+    weak.hash = weak.calculate_hash()
+    while weak.hash.startswith("0"):
+        weak.nonce += 1
+        weak.hash = weak.calculate_hash()
+    dump = tmp_path / "chain.jsonl"
+    target = tmp_path / "blockchain.json"
+    blocks = [dict(block.__dict__) for block in chain.chain + [weak]]
+    export_chain(iter(blocks), str(dump), "jsonl", {'difficulty': chain.difficulty})
+
+    assert import_chain(str(dump), str(target), MINING_REWARD) is None
+    assert not target.exists()
+    assert not (tmp_path / "blockchain.json.import").exists()
+
+def test_import_rejects_edited_transactions(chain, tmp_path):
+    dump = tmp_path / "chain.jsonl"
+    blocks = [dict(block.__dict__) for block in chain.chain]
+    blocks[2]['transactions'] = blocks[2]['transactions'] + ["Injected"]
+    export_chain(iter(blocks), str(dump), "jsonl", {'difficulty': chain.difficulty})
+
+    assert import_chain(str(dump), str(tmp_path / "blockchain.json"), MINING_REWARD) is None
+
+def test_binary_dump_is_smaller_than_jsonl(chain, tmp_path):
+    blocks = [dict(block.__dict__) for block in chain.chain]
+    export_chain(iter(blocks), str(tmp_path / "chain.jsonl"), "jsonl", {'difficulty': 2})
+    export_chain(iter(blocks), str(tmp_path / "chain.bin"), "binary", {'difficulty': 2})
+    header = json.loads((tmp_path / "chain.jsonl").read_text().splitlines()[0])
+    assert header['format'] == "mini-blockchain"
+    assert (tmp_path / "chain.bin").stat().st_size < (tmp_path / "chain.jsonl").stat().st_size
+
+def test_import_enforces_the_target_difficulty(tmp_path):
+    weak = Blockchain(difficulty=0)
+    for _ in range(3):
+        weak.mine_pending_transactions("mallory")
+    dump = tmp_path / "chain.jsonl"
+    export_chain((dict(block.__dict__) for block in weak.chain), str(dump), "jsonl", {'difficulty': 0})
+
+    assert import_chain(str(dump), str(tmp_path / "blockchain.json"), MINING_REWARD, min_difficulty=3) is None
+    assert not (tmp_path / "blockchain.json").exists()
+
+def test_import_applies_state_rules(chain, tmp_path):
+    minted = Block(3, [Transaction(COINBASE, "mallory", 10**9, 3).to_dict()],
+                   time.time(), chain.last_block.hash).mine_block(chain.difficulty)
+    dump = tmp_path / "chain.jsonl"
+    blocks = [dict(block.__dict__) for block in chain.chain + [minted]]
+    export_chain(iter(blocks), str(dump), "jsonl", {'difficulty': chain.difficulty})
+
+    assert import_chain(str(dump), str(tmp_path / "blockchain.json"), MINING_REWARD) is None
+
+def run_cli(cwd, *args):
+    cli = __file__.replace("tests/test_chain_io.py", "src/cli.py")
+    result = subprocess.run([sys.executable, cli, *args], cwd=cwd, capture_output=True, text=True)
+    return result.stdout
+
+def test_cli_import_refuses_to_replace_a_chain_with_blocks(chain, tmp_path):
+    dump = tmp_path / "chain.jsonl"
+    export_chain((dict(block.__dict__) for block in chain.chain), str(dump), "jsonl", {'difficulty': 2})
+    run_cli(tmp_path, "mine", "--reward-to", "carol")
+    before = (tmp_path / "blockchain.json").read_text()
+
+    assert "--force" in run_cli(tmp_path, "import", str(dump))
+    assert (tmp_path / "blockchain.json").read_text() == before
+    assert "Imported 3 blocks" in run_cli(tmp_path, "import", str(dump), "--force")
+    assert Blockchain.load_from_file(str(tmp_path / "blockchain.json")).get_balance("bob") == 5
+
+def test_chain_files_from_an_older_hash_rule_are_refused(chain, tmp_path):
+    filename = str(tmp_path / "blockchain.json")
+    chain.save_to_file(filename)
+    assert iter_chain_file(filename)[0]['hash_version'] == HASH_VERSION
+    assert Blockchain.load_from_file(filename).is_chain_valid()
+
+    old = tmp_path / "old"
+    old.mkdir()
+    (old / "blockchain.json").write_text(json.dumps({'difficulty': 2, 'chain': [
+        dict(block.__dict__) for block in chain.chain]}))
+    with pytest.raises(ChainFileError):
+        Blockchain.load_from_file(str(old / "blockchain.json"))
+    assert "hash version 1" in run_cli(old, "validate")
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+from chains import chain_filename, is_valid_chain_name
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "cli.py")
+
+def run_cli(cwd, *args):
+    return subprocess.run([sys.executable, CLI, *args], cwd=cwd, capture_output=True, text=True).stdout
+
+def test_chain_names_and_files():
+    assert is_valid_chain_name("test-net_2")
+    assert not is_valid_chain_name("../escape")
+    assert chain_filename("default") == "blockchain.json"
+    assert chain_filename("test") == os.path.join("chains", "test", "blockchain.json")
+
+def test_reading_an_unknown_chain_creates_nothing(tmp_path):
+    assert "Unknown chain 'typo'" in run_cli(tmp_path, "balance", "bob", "--chain", "typo")
+    assert "Unknown chain 'typo'" in run_cli(tmp_path, "validate", "--chain", "typo")
+    assert not (tmp_path / "chains").exists()
+
+def test_writing_creates_the_chain(tmp_path):
+    run_cli(tmp_path, "mine", "--reward-to", "alice", "--chain", "test")
+    assert (tmp_path / "chains" / "test" / "blockchain.json").exists()
+    assert "alice: 50" in run_cli(tmp_path, "balance", "alice", "--chain", "test")
+    assert not (tmp_path / "blockchain.json").exists()  # The default chain is untouched
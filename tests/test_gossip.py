@@ -0,0 +1,80 @@
+import socket
+import pytest
+from blockchain import Blockchain
+from p2p_network import Node, send_message, recv_message, short_id
+from transaction import Transaction
+
+@pytest.fixture
+def nodes(tmp_path, free_port):
+    """Two connected nodes on chains sharing a genesis block; alice holds 50 coins on both"""
+    first = Blockchain(difficulty=1)
+    first.mine_pending_transactions("alice")
+    second = Blockchain(difficulty=1)
+    second.chain[0] = first.chain[0]
+    assert second.link_block(first.chain[1])
+    started = []
+    for name, bc in (("a", first), ("b", second)):
+        node = Node('127.0.0.1', free_port(), bc, peers_file=str(tmp_path / f"peers_{name}.json"))
+        node.start()
+        started.append(node)
+    assert started[0].connect_to_peer('127.0.0.1', started[1].port)
+    yield started
+    for node in started:
+        node.stop()
+
+def test_transactions_are_relayed(nodes, wait_for):
+    sender, receiver = nodes
+    transfer = Transaction("alice", "bob", 5, 0).to_dict()
+    assert sender.submit_transaction(transfer) == 2
+    assert wait_for(lambda: receiver.blockchain.get_pending() == [transfer])
+    assert sender.submit_transaction(transfer) is None  # Already seen
+
+def test_compact_block_is_rebuilt_from_the_pool(nodes, wait_for):
+    miner, receiver = nodes
+    transfer = Transaction("alice", "bob", 5, 0).to_dict()
+    miner.submit_transaction(transfer)
+    assert wait_for(lambda: receiver.blockchain.get_pending() == [transfer])
+
+    block = miner.blockchain.mine_pending_transactions("carol")
+    miner.broadcast_block(block)
+    assert wait_for(lambda: receiver.blockchain.last_block.hash == block.hash)
+    assert receiver.blockchain.get_pending() == []
+    assert receiver.blockchain.get_balance("bob") == 5
+
+def test_late_gossip_does_not_return_to_the_pool(nodes, wait_for):
+    miner, receiver = nodes
+    transfer = Transaction("alice", "bob", 5, 0).to_dict()
+    miner.blockchain.add_transaction(transfer)
+    block = miner.blockchain.mine_pending_transactions()
+    miner.broadcast_block(block)  # Receiver fetches the missing body
+    assert wait_for(lambda: receiver.blockchain.last_block.hash == block.hash)
+
+    assert receiver.submit_transaction(transfer) is None
+    assert receiver.blockchain.add_transaction(transfer) is None
+    assert receiver.blockchain.get_pending() == []
+
+def test_legacy_text_can_be_added_again():
+    bc = Blockchain(difficulty=1)
+    assert bc.add_transaction("Alice pays Bob 5 BTC") == 1
+    bc.mine_pending_transactions()
+    assert bc.add_transaction("Alice pays Bob 5 BTC") == 2
+    assert bc.mine_pending_transactions().transactions == ["Alice pays Bob 5 BTC"]
+
+def test_short_ids_are_txid_prefixes():
+    transfer = Transaction("alice", "bob", 5, 0)
+    assert transfer.txid.startswith(short_id(transfer.to_dict()))
+
+def test_recv_message_reads_one_line():
+    left, right = socket.socketpair()
+    with left, right:
+        right.sendall(b'{"type": "ping"}\n')
+        assert recv_message(left) == {'type': 'ping'}
+        right.close()
+        assert recv_message(left) is None  # Closed without a message
+
+def test_recv_message_refuses_oversized_messages():
+    left, right = socket.socketpair()
+    with left, right:
+        right.sendall(b"x" * 5000)
+        with pytest.raises(ValueError):
+            recv_message(left, max_size=4096)
@@ -0,0 +1,111 @@
+import socket
+import time
+import pytest
+from block import Block
+from blockchain import Blockchain
+from headers import HeaderChain, HEADER_RECORD, header_from_block
+from light_node import LightNode
+from p2p_network import send_message
+
+@pytest.fixture
+def bc():
+    bc = Blockchain(difficulty=1)
+    for _ in range(3):
+        bc.mine_pending_transactions("alice")
+    return bc
+
+@pytest.fixture
+def headers(bc):
+    return [header_from_block(block) for block in bc.chain]
+
+def test_valid_headers_are_added(headers):
+    chain = HeaderChain(difficulty=1)
+    assert chain.add_headers(headers) == 4
+    assert chain.is_valid()
+    assert chain.last_header == headers[-1]
+    assert chain.memory_usage() == 4 * HEADER_RECORD.size
+    assert chain.add_headers(headers[1:]) == 0  # Already held
+
+def test_forged_proof_of_work_is_rejected(headers):
+    # Keep a hash that meets the difficulty but change the fields under it
+    forged = dict(headers[-1], nonce=headers[-1]['nonce'] + 1)
+    assert HeaderChain(difficulty=1).add_headers(headers[:-1] + [forged]) is None
+
+def test_forged_transaction_root_is_rejected(headers):
+    forged = dict(headers[-1], tx_root="ab" * 32)
+    assert HeaderChain(difficulty=1).add_headers(headers[:-1] + [forged]) is None
+
+def test_broken_link_is_rejected(headers):
+    chain = HeaderChain(difficulty=1)
+    chain.add_headers(headers[:2])
+    assert chain.add_headers(headers[3:]) is None  # Gap above the tip
+    assert chain.add_headers([headers[0], headers[2]]) is None
+    assert len(chain) == 2
+
+def test_insufficient_difficulty_is_rejected(bc, headers):
+    weak = Block(1, ["Cheap block"], time.time(), bc.chain[0].hash)
+    weak.hash = weak.calculate_hash()
+    while weak.hash.startswith("00") or not weak.hash.startswith("0"):
+        weak.nonce += 1
+        weak.hash = weak.calculate_hash()
+    chain = HeaderChain(difficulty=2)
+    chain.add_headers(headers[:1])
+    assert chain.add_headers([header_from_block(weak)]) is None
+    assert HeaderChain(difficulty=1).add_headers([headers[0], header_from_block(weak)]) == 2
+
+def test_longer_fork_replaces_the_tip(bc, headers):
+    chain = HeaderChain(difficulty=1)
+    chain.add_headers(headers)
+    fork = Blockchain(difficulty=1)
+    fork.chain[0] = bc.chain[0]
+    for _ in range(4):
+        fork.mine_pending_transactions("bob")
+    fork_headers = [header_from_block(block) for block in fork.chain]
+
+    assert chain.add_headers(fork_headers[1:4]) == 0  # Not longer yet
+    assert chain.last_header == headers[-1]
+    assert chain.add_headers(fork_headers[1:]) == 4
+    assert chain.last_header == fork_headers[-1]
+    assert chain.is_valid()
+
+def test_pruned_block_header_still_verifies(bc):
+    block = bc.chain[1]
+    pruned = Block.from_dict(dict(block.__dict__, transactions=None))
+    chain = HeaderChain(difficulty=1)
+    assert chain.add_headers([header_from_block(bc.chain[0]), header_from_block(pruned)]) == 2
+
+def test_save_and_load(headers, tmp_path):
+    chain = HeaderChain(difficulty=1)
+    chain.add_headers(headers)
+    filename = str(tmp_path / "headers.dat")
+    chain.save_to_file(filename)
+
+    loaded = HeaderChain.load_from_file(filename)
+    assert loaded.difficulty == 1
+    assert list(loaded.iter_headers()) == headers
+
+def deliver(node, message):
+    """Hand one message to a light node over a real TCP connection"""
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        with socket.create_connection(listener.getsockname()) as client:
+            server, _ = listener.accept()
+            send_message(client, message)
+            node.handle_connection(server)
+
+def test_light_node_ignores_the_claimed_sender(headers, tmp_path):
+    chain = HeaderChain(difficulty=1)
+    chain.add_headers(headers[:2])
+    node = LightNode('127.0.0.1', 0, chain, peers_file=str(tmp_path / "peers.json"))
+    spoofed = ["10.0.0.9", 5000]
+
+    deliver(node, {'type': 'compact_block', 'header': headers[2], 'sender': spoofed})
+    assert len(chain) == 3
+    assert node.peer_manager.stats(("127.0.0.1", None))['useful_blocks'] == 1
+    assert node.peer_manager.stats(tuple(spoofed))['useful_blocks'] == 0
+
+    # A ban of the real host holds whatever sender the messages claim
+    node.peer_manager.record_invalid_block(("127.0.0.1", None))
+    deliver(node, {'type': 'compact_block', 'header': headers[3], 'sender': spoofed})
+    assert len(chain) == 3
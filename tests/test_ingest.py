@@ -0,0 +1,80 @@
+import pytest
+from block import header_hash
+from blockchain import Blockchain
+from ingest import BlockIngestPipeline
+
+@pytest.fixture
+def peer_chain():
+    bc = Blockchain(difficulty=1)
+    for _ in range(2):
+        bc.mine_pending_transactions("peer")
+    return bc
+
+@pytest.fixture
+def local():
+    return Blockchain(difficulty=1)
+
+@pytest.fixture
+def pipeline(local, peer_chain):
+    local.chain[0] = peer_chain.chain[0]
+    invalid = []
+    pipeline = BlockIngestPipeline(local, workers=1, on_invalid=invalid.append)
+    pipeline.invalid = invalid
+    pipeline.start()
+    yield pipeline
+    pipeline.stop()
+
+def test_orphan_links_when_its_parent_arrives_by_sync(pipeline, local, peer_chain, wait_for):
+    first, second = peer_chain.chain[1:]
+    pipeline.submit(dict(second.__dict__), ("10.0.0.1", 5000))
+    assert wait_for(lambda: pipeline.stats()['orphans'] == 1)
+
+    assert local.link_block(first)  # Parent arrives outside the pipeline
+    assert wait_for(lambda: len(local.chain) == 3)
+    assert local.last_block.hash == second.hash
+
+def test_bad_proof_of_work_reports_the_peer(pipeline, peer_chain, wait_for):
+    forged = dict(peer_chain.chain[1].__dict__, nonce=peer_chain.chain[1].nonce + 1)
+    pipeline.submit(forged, ("10.0.0.1", 5000))
+    assert wait_for(lambda: pipeline.invalid == [("10.0.0.1", 5000)])
+
+def bodiless_block(parent):
+    """Block data with no transaction list whose header still meets difficulty 1"""
+    header = {'index': parent.index + 1, 'timestamp': parent.timestamp + 1,
+              'previous_hash': parent.hash, 'nonce': 0, 'tx_root': "00" * 32}
+    while not header_hash(header).startswith("0"):
+        header['nonce'] += 1
+    return dict(header, hash=header_hash(header), transactions=None)
+
+def test_block_without_transactions_is_rejected(pipeline, local, peer_chain, wait_for):
+    pipeline.submit(bodiless_block(local.last_block), ("10.0.0.2", 5000))
+    assert wait_for(lambda: pipeline.invalid == [("10.0.0.2", 5000)])
+
+    # The linker is still alive for the next honest block
+    pipeline.submit(dict(peer_chain.chain[1].__dict__), ("10.0.0.1", 5000))
+    assert wait_for(lambda: len(local.chain) == 2)
+
+def test_linker_survives_an_unexpected_error(pipeline, local, peer_chain, wait_for):
+    original = local.link_block
+    local.link_block = lambda block, hash_checked=False: 1 / 0
+    pipeline.submit(dict(peer_chain.chain[1].__dict__), ("10.0.0.1", 5000))
+    assert wait_for(lambda: pipeline.stats()['rejected'] == 1)
+
+    local.link_block = original
+    pipeline.submit(dict(peer_chain.chain[1].__dict__), ("10.0.0.1", 5000))
+    assert wait_for(lambda: len(local.chain) == 2)
+    assert pipeline.stats()['accepted'] == 1
+
+def test_bodiless_peer_block_is_refused_by_the_chain(local):
+    block_data = bodiless_block(local.last_block)
+    assert local.add_block_from_peer(block_data) is False
+
+def test_block_losing_a_race_is_stale_not_invalid(pipeline, local):
+    late = local.create_block_template(miner_address="peer")
+    late.mine_block(1)
+    local.mine_pending_transactions("alice")
+    assert local.link_block(late) is None
+    pipeline._try_link(late, ("10.0.0.1", 5000))
+
+    assert pipeline.stats()['stale'] == 1
+    assert pipeline.invalid == []
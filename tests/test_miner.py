@@ -0,0 +1,57 @@
+import time
+from blockchain import Blockchain
+from miner import MiningService, search_nonce_range
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+def test_search_nonce_range_finds_a_valid_nonce():
+    bc = Blockchain(difficulty=1)
+    template = bc.create_block_template(miner_address="alice")
+    nonce, block_hash = search_nonce_range(template.header(), 1, 0, 10000)
+    template.nonce, template.hash = nonce, block_hash
+    assert template.has_valid_proof(1)
+    assert search_nonce_range(template.header(), 64, 0, 10) is None
+
+def test_miner_cuts_a_block_once_latency_expires(tmp_path):
+    bc = Blockchain(difficulty=1)
+    miner = MiningService(bc, workers=1, max_latency=0.1, save_file=str(tmp_path / "chain.json"))
+    miner.start()
+    try:
+        bc.add_transaction("Alice pays Bob 1 BTC")
+        assert wait_for(lambda: len(bc.chain) == 2)
+    finally:
+        miner.stop()
+    assert bc.get_pending() == []
+    assert miner.status()['blocks_mined'] == 1
+    assert (tmp_path / "chain.json").exists()
+
+def test_failed_save_keeps_the_block_and_the_miner(tmp_path):
+    bc = Blockchain(difficulty=1)
+    miner = MiningService(bc, workers=1, max_latency=0.1, save_file=str(tmp_path / "missing" / "chain.json"))
+    miner.start()
+    try:
+        bc.add_transaction("Alice pays Bob 1 BTC")
+        assert wait_for(lambda: len(bc.chain) == 2)
+        assert wait_for(lambda: miner.last_error is not None)
+        assert miner.running
+    finally:
+        miner.stop()
+
+def test_loop_error_stops_the_miner_and_is_reported():
+    class BrokenChain(Blockchain):
+        def pending_status(self):
+            raise RuntimeError("index corrupted")
+
+    miner = MiningService(BrokenChain(difficulty=1), workers=1, save_file=None)
+    miner.start()
+    try:
+        assert wait_for(lambda: not miner.running)
+        assert "index corrupted" in miner.last_error
+    finally:
+        miner.stop()
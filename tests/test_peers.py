@@ -0,0 +1,64 @@
+import time
+import pytest
+from blockchain import Blockchain
+from p2p_network import Node, INBOUND_IDLE_SECONDS
+from peers import PeerManager
+
+class FakeSocket:
+    def __init__(self, host, port=40000):
+        self.address = (host, port)
+
+    def getpeername(self):
+        return self.address
+
+@pytest.fixture
+def manager(tmp_path):
+    return PeerManager(str(tmp_path / "peers.json"))
+
+@pytest.fixture
+def node(tmp_path):
+    return Node('127.0.0.1', 0, Blockchain(difficulty=1), peers_file=str(tmp_path / "peers.json"))
+
+def test_rank_prefers_fast_reliable_peers(manager):
+    fast, slow, flaky = ("10.0.0.1", 5000), ("10.0.0.2", 5000), ("10.0.0.3", 5000)
+    manager.record_success(fast, 0.01)
+    manager.record_success(slow, 0.5)
+    manager.record_success(flaky, 0.01)
+    manager.record_failure(flaky)
+    assert manager.rank([flaky, slow, fast]) == [fast, slow, flaky]
+
+def test_banned_peers_are_skipped_and_survive_restarts(manager, tmp_path):
+    peer = ("10.0.0.1", 5000)
+    manager.record_invalid_block(peer)
+    assert manager.is_banned(peer)
+    assert manager.rank([peer]) == []
+    manager.save()
+    assert PeerManager(str(tmp_path / "peers.json")).is_banned(peer)
+
+def test_ban_without_a_port_covers_the_host(manager):
+    manager.record_invalid_block(("10.0.0.1", None))
+    assert manager.is_banned(("10.0.0.1", 5000))
+    assert not manager.is_banned(("10.0.0.2", 5000))
+    assert manager.addresses() == []  # Port-less entries are never shared
+
+def test_identify_uses_the_connection_address(node):
+    spoofed = {'type': 'new_block', 'sender': ["10.0.0.9", 5000]}
+    assert node.identify(spoofed, FakeSocket("10.0.0.1")) == ("10.0.0.1", None)
+
+    handshake = {'type': 'connect', 'port': 6000, 'sender': ["10.0.0.9", 5000]}
+    assert node.identify(handshake, FakeSocket("10.0.0.1")) == ("10.0.0.1", 6000)
+    node.peers.add(("10.0.0.1", 6000))
+    message = {'type': 'new_block', 'sender': ["10.0.0.9", 6000]}
+    assert node.identify(message, FakeSocket("10.0.0.1")) == ("10.0.0.1", 6000)
+
+def test_idle_inbound_peers_lose_their_slot(node):
+    idle, active = ("10.0.0.1", 5000), ("10.0.0.2", 5000)
+    for peer in (idle, active):
+        node.peers.add(peer)
+        node.inbound.add(peer)
+    node.last_heard[idle] = time.time() - INBOUND_IDLE_SECONDS - 1
+    node.last_heard[active] = time.time()
+
+    node.expire_inbound()
+    assert node.inbound == {active}
+    assert node.peers == {active}
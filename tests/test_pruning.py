@@ -0,0 +1,34 @@
+import pytest
+from blockchain import Blockchain
+from storage import SEGMENT_SIZE
+
+@pytest.fixture
+def long_chain():
+    bc = Blockchain(difficulty=0)
+    for i in range(2 * SEGMENT_SIZE + 20):
+        bc.add_transaction(f"Transaction {i}")
+        bc.mine_pending_transactions("alice")
+    return bc
+
+def test_pruned_bodies_are_archived_and_reloaded(long_chain, tmp_path):
+    filename = str(tmp_path / "blockchain.json")
+    long_chain.enable_pruning(10)
+    long_chain.save_to_file(filename)
+
+    assert long_chain.pruned_height == 2 * SEGMENT_SIZE - 1
+    assert long_chain.chain[5].transactions is None
+    assert long_chain.get_block(5).transactions[1] == "Transaction 4"
+    assert long_chain.is_chain_valid()
+
+    loaded = Blockchain.load_from_file(filename)
+    assert loaded.pruned_height == long_chain.pruned_height
+    assert loaded.get_block(5).transactions[1] == "Transaction 4"
+    assert loaded.get_balance("alice") == long_chain.get_balance("alice")
+    assert loaded.is_chain_valid()
+
+def test_discarded_bodies_cannot_be_served(long_chain, tmp_path):
+    long_chain.enable_pruning(10, archive=False)
+    long_chain.save_to_file(str(tmp_path / "blockchain.json"))
+    assert long_chain.get_block(5).transactions is None
+    assert not long_chain.can_serve_from(0)
+    assert long_chain.can_serve_from(2 * SEGMENT_SIZE)
@@ -0,0 +1,79 @@
+import json
+import urllib.error
+import urllib.request
+import pytest
+from blockchain import Blockchain
+from query_api import QueryAPI
+
+@pytest.fixture
+def chain():
+    bc = Blockchain(difficulty=1)
+    for i in range(5):
+        bc.add_transaction(f"Transaction {i}")
+        bc.mine_pending_transactions("alice")
+    return bc
+
+@pytest.fixture
+def get(chain, free_port):
+    api = QueryAPI(chain, port=free_port())
+    api.start()
+
+    def get(path, etag=None):
+        """Return (status, headers, parsed body or None)"""
+        request = urllib.request.Request(f"http://127.0.0.1:{api.port}{path}")
+        if etag:
+            request.add_header('If-None-Match', etag)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            body = e.read()
+            return e.code, e.headers, json.loads(body) if body else None
+    get.api = api
+    yield get
+    api.stop()
+
+def test_summary_and_block_pages(get, chain):
+    status, _, summary = get("/summary")
+    assert status == 200
+    assert summary['height'] == 5
+    assert summary['tip_hash'] == chain.last_block.hash
+
+    _, _, page = get("/blocks?page=1&limit=2")
+    assert [block['index'] for block in page['blocks']] == [3, 2]
+    _, _, block = get("/blocks/2")
+    assert block['hash'] == chain.chain[2].hash
+    _, _, transactions = get("/transactions?limit=3")
+    assert [item['block'] for item in transactions['transactions']] == [5, 5, 4]
+
+def test_bad_requests_are_reported(get):
+    assert get("/blocks/99")[0] == 404
+    assert get("/blocks/two")[0] == 400
+    assert get("/blocks?limit=0")[0] == 400
+    assert get("/nowhere")[0] == 404
+
+def test_conditional_requests(get):
+    etag = get("/summary")[1]['ETag']
+    assert get("/summary", etag)[0] == 304
+    # The ETag is not a licence to answer 304 for invalid requests
+    assert get("/nowhere", etag)[0] == 404
+    assert get("/blocks/99", etag)[0] == 404
+
+def test_responses_are_cached_until_the_chain_changes(get, chain):
+    get("/summary")
+    get("/summary")
+    assert get.api.stats()['hits'] == 1
+
+    chain.difficulty = 3
+    assert get("/summary")[2]['difficulty'] == 3
+    chain.mine_pending_transactions("bob")
+    assert get("/summary")[2]['height'] == 6
+    assert get.api.stats()['hits'] == 1
+
+def test_setting_changes_give_a_new_etag(get, chain):
+    etag = get("/summary")[1]['ETag']
+    chain.pruned_height = 2
+    status, headers, summary = get("/summary", etag)
+    assert status == 200
+    assert summary['pruned_height'] == 2
+    assert headers['ETag'] != etag
@@ -0,0 +1,58 @@
+import threading
+import time
+from rwlock import ReadWriteLock
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_inside = threading.Barrier(2, timeout=2)
+
+    def reader():
+        with lock.read():
+            both_inside.wait()  # Only passes if the two readers overlap
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not both_inside.broken
+
+def test_writer_waits_for_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.1)
+        events.append("read done")
+    thread.join()
+    assert events == ["read done", "write"]
+
+def test_waiting_writer_blocks_new_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    def reader():
+        with lock.read():
+            events.append("second read")
+
+    with lock.read():
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        time.sleep(0.1)  # Writer is now waiting
+        reader_thread = threading.Thread(target=reader)
+        reader_thread.start()
+        time.sleep(0.1)
+        assert events == []
+    writer_thread.join()
+    reader_thread.join()
+    assert events == ["write", "second read"]
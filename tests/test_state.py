@@ -0,0 +1,52 @@
+import time
+from block import Block
+from state import AccountState
+from transaction import Transaction, COINBASE
+
+def block_with(index, transactions, previous_hash="0" * 64):
+    block = Block(index, transactions, time.time(), previous_hash)
+    block.hash = block.calculate_hash()
+    return block
+
+def test_apply_and_revert():
+    state = AccountState()
+    first = block_with(1, [Transaction(COINBASE, "alice", 50, 1).to_dict()])
+    second = block_with(2, [Transaction("alice", "bob", 20, 0).to_dict()], first.hash)
+
+    assert state.check_block(first, 50)
+    state.apply_block(first)
+    assert state.check_block(second, 50)
+    state.apply_block(second)
+    assert (state.balance("alice"), state.balance("bob")) == (30, 20)
+    assert state.next_nonce("alice") == 1
+    assert len(state.history["bob"]) == 1
+
+    assert state.revert_block(second)
+    assert (state.balance("alice"), state.balance("bob")) == (50, 0)
+    assert state.next_nonce("alice") == 0
+    assert "bob" not in state.history
+    assert state.tip_hash == first.hash
+    assert not state.revert_block(second)  # Only the tip can be reverted
+
+def test_invalid_blocks_are_refused():
+    state = AccountState()
+    assert not state.check_block(block_with(1, [Transaction("alice", "bob", 1, 0).to_dict()]), 50)
+    assert not state.check_block(block_with(1, [Transaction(COINBASE, "alice", 51, 1).to_dict()]), 50)
+    state.apply_block(block_with(1, [Transaction(COINBASE, "alice", 50, 1).to_dict()]))
+    assert not state.check_block(block_with(2, [Transaction("alice", "bob", 1, 5).to_dict()]), 50)
+
+def test_legacy_transactions_do_not_touch_balances():
+    state = AccountState()
+    block = block_with(1, ["Alice pays Bob 1 BTC"])
+    assert state.check_block(block, 50)
+    state.apply_block(block)
+    assert state.balances == {}
+
+def test_checkpoint_round_trip(tmp_path):
+    state = AccountState()
+    state.apply_block(block_with(1, [Transaction(COINBASE, "alice", 50, 1).to_dict()]))
+    filename = str(tmp_path / "state.json")
+    AccountState.save_checkpoint(state.to_dict(), filename)
+    loaded = AccountState.load_checkpoint(filename)
+    assert loaded.balance("alice") == 50
+    assert loaded.height == 1
@@ -0,0 +1,55 @@
+import pytest
+from worker_pool import SharedWorkerPool
+
+def queued_pool():
+    """Pool that accepts tasks but never dispatches them, to inspect the schedule"""
+    pool = SharedWorkerPool(workers=1)
+    pool.running = True
+    return pool
+
+def drain(pool):
+    order = []
+    with pool._cond:
+        while True:
+            task = pool._next_task()
+            if task is None:
+                return order
+            chain_id, _, _, args = task
+            order.append((chain_id, args[0]))
+
+def test_chains_are_served_round_robin():
+    pool = queued_pool()
+    for i in range(3):
+        pool.submit("busy", abs, i)
+    pool.submit("quiet", abs, 10)
+    pool.submit("other", abs, 20)
+
+    assert drain(pool) == [("busy", 0), ("quiet", 10), ("other", 20), ("busy", 1), ("busy", 2)]
+
+def test_urgent_tasks_jump_their_chain_queue():
+    pool = queued_pool()
+    pool.submit("a", abs, 1)
+    pool.submit("a", abs, 2)
+    pool.submit("a", abs, 3, urgent=True)
+
+    assert [value for _, value in drain(pool)] == [3, 1, 2]
+
+def test_cancelled_tasks_are_skipped():
+    pool = queued_pool()
+    first = pool.submit("a", abs, 1)
+    pool.submit("a", abs, 2)
+    assert first.cancel()
+
+    assert drain(pool) == [("a", 2)]
+
+def test_tasks_run_in_worker_processes():
+    pool = SharedWorkerPool(workers=2)
+    pool.start()
+    try:
+        futures = [pool.submit(chain, pow, 2, n) for n in range(4) for chain in ("a", "b")]
+        assert [future.result(timeout=30) for future in futures] == [1, 1, 2, 2, 4, 4, 8, 8]
+        assert pool.stats()['completed'] == {"a": 4, "b": 4}
+    finally:
+        pool.stop()
+    with pytest.raises(RuntimeError):
+        pool.submit("a", pow, 2, 1)